@@ -22,6 +22,13 @@ import random
 import re
 from datetime import datetime, timezone
 
+# libuv 기반 이벤트 루프 (Playwright CDP 메시지 처리 가속, POSIX 전용)
+try:
+    import uvloop
+    HAS_UVLOOP = sys.platform != 'win32'
+except ImportError:
+    HAS_UVLOOP = False
+
 
 # =============================================================================
 # Region-aware config loader
@@ -384,4 +391,6 @@ async def run_region(region: str, test_mode: bool, limit: int | None, no_sync: b
 
 
 if __name__ == '__main__':
+    if HAS_UVLOOP:
+        uvloop.install()
     asyncio.run(main())
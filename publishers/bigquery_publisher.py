@@ -8,9 +8,8 @@ BigQuery Publisher - 리뷰 데이터를 BigQuery에 적재
 
 import logging
 import os
-import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
 from google.cloud import bigquery
@@ -38,6 +37,9 @@ class BigQueryPublisher:
         "order_id", "sku",
     ]
 
+    # MERGE용 임시 테이블 자동 만료 (삭제 실패 시 대비)
+    TEMP_TABLE_TTL = timedelta(hours=6)
+
     def __init__(
         self,
         project_id: str = "member-378109",
@@ -61,8 +63,14 @@ class BigQueryPublisher:
         reviews: list[dict],
         platform: str,
         collected_at: Optional[str] = None,
+        fixed_columns: Optional[dict] = None,
     ) -> dict:
-        """증분 업데이트 메인 메서드 (MERGE 방식)"""
+        """증분 업데이트 메인 메서드 (MERGE 방식)
+
+        fixed_columns: 모든 리뷰에 동일하게 적용할 컬럼 값
+            (예: {"platform_country": "SG", "author_country": None}).
+            호출 측에서 리뷰 dict를 미리 수정하지 않고 정규화 시 함께 적용.
+        """
         if not reviews:
             logger.info("[%s] 추가할 리뷰가 없습니다", platform)
             return {"inserted": 0, "updated": 0, "total_processed": 0, "status": "success"}
@@ -70,25 +78,14 @@ class BigQueryPublisher:
         collected_at = collected_at or datetime.now(timezone.utc).isoformat()
 
         # 1. 정규화
-        normalized = [self._normalize_review(r, platform, collected_at) for r in reviews]
+        normalize = self._make_normalizer(platform, fixed_columns)
+        normalized = [normalize(r, collected_at) for r in reviews]
         logger.info("[%s] %d개 리뷰 정규화 완료", platform, len(normalized))
 
-        # 2. 배치 MERGE (1000건씩)
-        batch_size = 1000
-        total_inserted = 0
-        total_updated = 0
-
-        for i in range(0, len(normalized), batch_size):
-            batch = normalized[i:i + batch_size]
-            result = self._merge_reviews(batch)
-            total_inserted += result["inserted"]
-            total_updated += result["updated"]
-            logger.info(
-                "[%s] 배치 %d/%d 완료: insert=%d, update=%d",
-                platform, i // batch_size + 1,
-                (len(normalized) + batch_size - 1) // batch_size,
-                result["inserted"], result["updated"],
-            )
+        # 2. 임시 테이블 load job 1회 + MERGE 1회
+        result = self._merge_reviews(normalized)
+        total_inserted = result["inserted"]
+        total_updated = result["updated"]
 
         logger.info(
             "[%s] 총 %d개 처리: insert=%d, update=%d",
@@ -104,102 +101,160 @@ class BigQueryPublisher:
 
     def _normalize_review(self, review: dict, platform: str, collected_at: str) -> dict:
         """플랫폼별 리뷰 데이터를 통합 스키마로 정규화"""
-        normalized = {
-            "review_id": str(review.get("review_id", "")),
-            "platform": platform,
-            "platform_country": _normalize_country(review.get("platform_country"), platform),
-            "collected_at": _to_timestamp(review.get("collected_at")) or _to_timestamp(collected_at),
-            "product_name": _to_str(review.get("product_name")),
-            "product_id": _to_str(review.get("product_id")),
-            "author": _to_str(review.get("author")),
-            "author_country": _normalize_country(review.get("author_country"), platform),
-            "star": _to_float(review.get("star")),
-            "title": _to_str(review.get("title")),
-            "content": _to_str(review.get("content")),
-            "date": _to_date_str(review.get("date")),
-            "verified_purchase": _to_bool(review.get("verified_purchase")),
-            "item_type": _to_str(review.get("item_type")),
-            "reply_content": _to_str(review.get("reply_content")),
-            "seller_reply": _to_str(review.get("seller_reply")),
-            "reply_count": _to_int(review.get("reply_count")),
-            "image_urls": _format_urls(review.get("image_urls")),
-            "video_urls": _format_urls(review.get("video_urls")),
-            "has_video": _to_bool(review.get("has_video")),
-            "likes_count": _to_int(review.get("likes_count")),
-            "detailed_rating_product": _to_float(review.get("detailed_rating_product")),
-            "detailed_rating_seller": _to_float(review.get("detailed_rating_seller")),
-            "detailed_rating_delivery": _to_float(review.get("detailed_rating_delivery")),
-            "order_id": _to_str(review.get("order_id")),
-            "sku": _to_str(review.get("sku")),
-        }
-        return normalized
+        return self._make_normalizer(platform)(review, collected_at)
 
-    def _merge_reviews(self, reviews: list[dict]) -> dict:
-        """임시 테이블 + MERGE 문으로 중복 제거 및 삽입"""
+    @staticmethod
+    def _make_normalizer(platform: str, fixed_columns: Optional[dict] = None):
+        """platform이 고정된 정규화 함수 생성
+
+        플랫폼별 상수(기본 국가 등)를 한 번만 계산하므로, 대량 리뷰는
+        normalize = _make_normalizer(platform) 후 행마다 normalize(review, collected_at) 호출.
+        fixed_columns가 있으면 정규화 결과에 그대로 덮어씀.
+        """
+        default_country = _PLATFORM_DEFAULT_COUNTRY.get(platform)
+
+        def normalize(review: dict, collected_at: str) -> dict:
+            get = review.get
+            row = {
+                "review_id": str(get("review_id", "")),
+                "platform": platform,
+                "platform_country": _country_code(get("platform_country")) or default_country,
+                "collected_at": _to_timestamp(get("collected_at")) or _to_timestamp(collected_at),
+                "product_name": _to_str(get("product_name")),
+                "product_id": _to_str(get("product_id")),
+                "author": _to_str(get("author")),
+                "author_country": _country_code(get("author_country")) or default_country,
+                "star": _to_float(get("star")),
+                "title": _to_str(get("title")),
+                "content": _to_str(get("content")),
+                "date": _to_date_str(get("date")),
+                "verified_purchase": _to_bool(get("verified_purchase")),
+                "item_type": _to_str(get("item_type")),
+                "reply_content": _to_str(get("reply_content")),
+                "seller_reply": _to_str(get("seller_reply")),
+                "reply_count": _to_int(get("reply_count")),
+                "image_urls": _format_urls(get("image_urls")),
+                "video_urls": _format_urls(get("video_urls")),
+                "has_video": _to_bool(get("has_video")),
+                "likes_count": _to_int(get("likes_count")),
+                "detailed_rating_product": _to_float(get("detailed_rating_product")),
+                "detailed_rating_seller": _to_float(get("detailed_rating_seller")),
+                "detailed_rating_delivery": _to_float(get("detailed_rating_delivery")),
+                "order_id": _to_str(get("order_id")),
+                "sku": _to_str(get("sku")),
+            }
+            if fixed_columns:
+                row.update(fixed_columns)
+            return row
+
+        return normalize
+
+    def _create_temp_table(self) -> tuple[str, list]:
+        """원본과 동일 스키마의 임시 테이블 생성 (파티셔닝/클러스터링 제외)
+
+        삭제에 실패해도 남지 않도록 TEMP_TABLE_TTL 후 자동 만료.
+        Returns: (임시 테이블 ID, 스키마) - 스키마는 load job에 명시 (autodetect 방지)
+        """
         temp_table_id = f"_temp_merge_{uuid.uuid4().hex[:8]}"
         temp_full_id = f"{self.project_id}.{self.dataset_id}.{temp_table_id}"
 
+        source_table = self.client.get_table(self.full_table_id)
+        temp_table = bigquery.Table(temp_full_id, schema=source_table.schema)
+        temp_table.expires = datetime.now(timezone.utc) + self.TEMP_TABLE_TTL
+        self.client.create_table(temp_table)
+        return temp_full_id, source_table.schema
+
+    def _merge_reviews(self, reviews: list[dict]) -> dict:
+        """임시 테이블(load job) + MERGE 문으로 중복 제거 및 삽입
+
+        streaming insert(insert_rows_json)는 요청 크기 제한 + streaming buffer flush 대기가
+        필요하므로, load job 1회로 전체 리뷰를 임시 테이블에 적재한다.
+        created_at/updated_at은 MERGE에서 CURRENT_TIMESTAMP()로 채움.
+        """
+        temp_full_id, schema = self._create_temp_table()
+
+        try:
+            # 1. 임시 테이블에 데이터 로드
+            rows_to_load = [{col: r.get(col) for col in self.ALL_COLUMNS} for r in reviews]
+            job_config = bigquery.LoadJobConfig(
+                schema=schema,
+                source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            )
+            self.client.load_table_from_json(
+                rows_to_load, temp_full_id, job_config=job_config
+            ).result()
+
+            # 2. MERGE 실행
+            return self._merge_from_table(temp_full_id)
+
+        finally:
+            # 3. 임시 테이블 삭제
+            self.client.delete_table(temp_full_id, not_found_ok=True)
+
+    def _merge_from_file(self, file_obj) -> dict:
+        """NDJSON 파일(ALL_COLUMNS 키)을 임시 테이블에 load job 1회로 적재 후 MERGE"""
+        temp_full_id, schema = self._create_temp_table()
+
         try:
-            # 1. 임시 테이블 생성 (원본과 동일 스키마, 파티셔닝/클러스터링 제외)
-            source_table = self.client.get_table(self.full_table_id)
-            temp_table = bigquery.Table(temp_full_id, schema=source_table.schema)
-            temp_table = self.client.create_table(temp_table)
-
-            # 2. 임시 테이블에 데이터 로드
-            rows_to_insert = []
-            for r in reviews:
-                row = {col: r.get(col) for col in self.ALL_COLUMNS}
-                row["created_at"] = datetime.now(timezone.utc).isoformat()
-                row["updated_at"] = datetime.now(timezone.utc).isoformat()
-                rows_to_insert.append(row)
-
-            errors = self.client.insert_rows_json(temp_table, rows_to_insert)
-            if errors:
-                logger.error("임시 테이블 삽입 오류: %s", errors[:3])
-                raise RuntimeError(f"임시 테이블 삽입 실패: {errors[:3]}")
-
-            # Streaming buffer flush 대기
-            time.sleep(10)
-
-            # 3. MERGE 실행
-            columns_str = ", ".join(self.ALL_COLUMNS)
-            source_columns_str = ", ".join(f"source.{c}" for c in self.ALL_COLUMNS)
-
-            merge_sql = f"""
-            MERGE `{self.full_table_id}` AS target
-            USING `{temp_full_id}` AS source
-            ON target.review_id = source.review_id AND target.platform = source.platform
-            WHEN NOT MATCHED THEN
-              INSERT ({columns_str}, created_at, updated_at)
-              VALUES ({source_columns_str}, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
-            WHEN MATCHED AND (
-              COALESCE(target.likes_count, 0) != COALESCE(source.likes_count, 0) OR
-              COALESCE(target.reply_content, '') != COALESCE(source.reply_content, '') OR
-              COALESCE(target.seller_reply, '') != COALESCE(source.seller_reply, '')
-            ) THEN
-              UPDATE SET
-                likes_count = source.likes_count,
-                reply_content = source.reply_content,
-                seller_reply = source.seller_reply,
-                reply_count = source.reply_count,
-                updated_at = CURRENT_TIMESTAMP()
-            """
-
-            job = self.client.query(merge_sql)
-            job.result()
-
-            stats = job.num_dml_affected_rows or 0
-            # DML 통계에서 insert/update 구분
-            dml_stats = job._properties.get("statistics", {}).get("query", {}).get("dmlStats", {})
-            inserted = int(dml_stats.get("insertedRowCount", "0"))
-            updated = int(dml_stats.get("updatedRowCount", "0"))
-
-            return {"inserted": inserted, "updated": updated}
+            # 1. 임시 테이블로 로드
+            job_config = bigquery.LoadJobConfig(
+                schema=schema,
+                source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            )
+            file_obj.seek(0)
+            self.client.load_table_from_file(
+                file_obj, temp_full_id, job_config=job_config
+            ).result()
+
+            # 2. MERGE 실행
+            return self._merge_from_table(temp_full_id)
 
         finally:
-            # 4. 임시 테이블 삭제
+            # 3. 임시 테이블 삭제
             self.client.delete_table(temp_full_id, not_found_ok=True)
 
+    def _merge_from_table(self, source_table_id: str) -> dict:
+        """source 테이블 → 본 테이블 MERGE (review_id + platform 기준 중복 제거)"""
+        columns_str = ", ".join(self.ALL_COLUMNS)
+        source_columns_str = ", ".join(f"source.{c}" for c in self.ALL_COLUMNS)
+
+        # source 내 동일 (review_id, platform) 중복은 하나만 사용 (MERGE는 1:1 매칭 필요)
+        merge_sql = f"""
+        MERGE `{self.full_table_id}` AS target
+        USING (
+          SELECT * FROM `{source_table_id}`
+          WHERE TRUE
+          QUALIFY ROW_NUMBER() OVER (PARTITION BY review_id, platform) = 1
+        ) AS source
+        ON target.review_id = source.review_id AND target.platform = source.platform
+        WHEN NOT MATCHED THEN
+          INSERT ({columns_str}, created_at, updated_at)
+          VALUES ({source_columns_str}, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
+        WHEN MATCHED AND (
+          COALESCE(target.likes_count, 0) != COALESCE(source.likes_count, 0) OR
+          COALESCE(target.reply_content, '') != COALESCE(source.reply_content, '') OR
+          COALESCE(target.seller_reply, '') != COALESCE(source.seller_reply, '')
+        ) THEN
+          UPDATE SET
+            likes_count = source.likes_count,
+            reply_content = source.reply_content,
+            seller_reply = source.seller_reply,
+            reply_count = source.reply_count,
+            updated_at = CURRENT_TIMESTAMP()
+        """
+
+        job = self.client.query(merge_sql)
+        job.result()
+
+        # DML 통계에서 insert/update 구분
+        dml_stats = job._properties.get("statistics", {}).get("query", {}).get("dmlStats", {})
+        inserted = int(dml_stats.get("insertedRowCount", "0"))
+        updated = int(dml_stats.get("updatedRowCount", "0"))
+
+        return {"inserted": inserted, "updated": updated}
+
     def get_existing_review_ids(self, platform: str, days: int = 30) -> set[str]:
         """기존 review_id 집합 조회"""
         query = f"""
@@ -309,20 +364,26 @@ _PLATFORM_DEFAULT_COUNTRY = {
 }
 
 
-def _normalize_country(value: Any, platform: str) -> Optional[str]:
-    """국가명을 ISO 2자리 코드로 정규화하고, 없으면 플랫폼 기본값 반환"""
+# 대소문자 무시 조회용 (선형 탐색 대신 dict 1회 조회)
+_COUNTRY_NORMALIZE_LOWER = {}
+for _key, _code in _COUNTRY_NORMALIZE.items():
+    _COUNTRY_NORMALIZE_LOWER.setdefault(_key.lower(), _code)
+
+
+def _country_code(value: Any) -> Optional[str]:
+    """국가명을 ISO 2자리 코드로 정규화 (값이 없으면 None)"""
     s = _to_str(value)
     if s:
         s = s.strip()
         if s in _COUNTRY_NORMALIZE:
             return _COUNTRY_NORMALIZE[s]
-        for key, code in _COUNTRY_NORMALIZE.items():
-            if key.lower() == s.lower():
-                return code
+        code = _COUNTRY_NORMALIZE_LOWER.get(s.lower())
+        if code:
+            return code
         if len(s) == 2 and s.isalpha():
             return s.upper()
         return s
-    return _PLATFORM_DEFAULT_COUNTRY.get(platform)
+    return None
 
 
 def _to_str(value: Any) -> Optional[str]:
@@ -9,7 +9,7 @@ Google Sheets API를 사용하여 Biodance 리뷰 발행
 
 import logging
 import os
-from typing import Any
+from typing import Any, Iterable
 
 import gspread
 from google.oauth2.service_account import Credentials
@@ -122,13 +122,8 @@ class GoogleSheetsPublisher:
             row.append(value)
         return row
 
-    def append_reviews(self, reviews: list[dict], collected_at: str) -> int:
-        """신규 리뷰를 US자사몰 시트에 batch append"""
-        if not reviews:
-            logger.info("추가할 신규 리뷰가 없습니다")
-            return 0
-
-        sheet = self._get_us_sheet()
+    def _get_or_create_headers(self, sheet: gspread.Worksheet) -> list[str]:
+        """기존 헤더 읽기 (비어있으면 기본 헤더 생성)"""
         headers = sheet.row_values(1)  # 기존 헤더 읽기
 
         if not headers:
@@ -143,59 +138,99 @@ class GoogleSheetsPublisher:
             sheet.update("A1:P1", [headers])
             logger.info("헤더 행 생성 완료: %d개 컬럼", len(headers))
 
+        return headers
+
+    def append_reviews(self, reviews: list[dict], collected_at: str) -> int:
+        """신규 리뷰를 US자사몰 시트에 batch append"""
+        if not reviews:
+            logger.info("추가할 신규 리뷰가 없습니다")
+            return 0
+
+        sheet = self._get_us_sheet()
+        headers = self._get_or_create_headers(sheet)
+
         rows = [self._format_review_row(r, collected_at, headers) for r in reviews]
 
         # Batch append (최대 1000행씩 분할)
         batch_size = 1000
         total_appended = 0
         for i in range(0, len(rows), batch_size):
-            batch = rows[i : i + batch_size]
-            try:
-                sheet.append_rows(batch, value_input_option="USER_ENTERED")
-                total_appended += len(batch)
-                logger.info(
-                    "배치 추가 완료: %d-%d/%d",
-                    i + 1,
-                    min(i + batch_size, len(rows)),
-                    len(rows),
-                )
-            except Exception as e:
-                logger.error("배치 추가 실패: %s", e)
-                raise
+            total_appended += self._append_batch(sheet, rows[i : i + batch_size], total_appended)
 
         return total_appended
 
-    def publish_incremental(self, results: dict) -> dict:
-        """증분 업데이트 메인 메서드"""
-        # 1. 기존 review_id 읽기
+    def _append_batch(self, sheet: gspread.Worksheet, batch: list[list[Any]], appended_so_far: int) -> int:
+        """행 배치 1회 append (추가된 행 수 반환)"""
+        try:
+            sheet.append_rows(batch, value_input_option="USER_ENTERED")
+        except Exception as e:
+            logger.error("배치 추가 실패: %s", e)
+            raise
+        logger.info("배치 추가 완료: 누적 %d행", appended_so_far + len(batch))
+        return len(batch)
+
+    def publish_incremental_stream(
+        self,
+        reviews: Iterable[dict],
+        collected_at: str,
+        total_products: int = 0,
+        batch_size: int = 1000,
+    ) -> dict:
+        """증분 업데이트 (스트리밍 버전)
+
+        리뷰를 iterator로 하나씩 받아 신규 리뷰만 batch_size 단위로 append.
+        전체 리뷰 목록을 메모리에 올리지 않는다.
+        """
         existing_ids = self._read_existing_review_ids()
 
-        # 2. 모든 리뷰 추출
-        all_reviews = []
-        for product in results.get("products", []):
-            all_reviews.extend(product.get("reviews", []))
+        sheet = None
+        headers: list[str] = []
+        batch: list[list[Any]] = []
+        total_reviews = 0
+        new_reviews = 0
+        appended_count = 0
+
+        for review in reviews:
+            total_reviews += 1
+            if review.get("review_id") in existing_ids:
+                continue
+            new_reviews += 1
+
+            if sheet is None:
+                sheet = self._get_us_sheet()
+                headers = self._get_or_create_headers(sheet)
 
-        # 3. 신규 리뷰 필터링
-        new_reviews = [r for r in all_reviews if r.get("review_id") not in existing_ids]
+            batch.append(self._format_review_row(review, collected_at, headers))
+            if len(batch) >= batch_size:
+                appended_count += self._append_batch(sheet, batch, appended_count)
+                batch = []
+
+        if batch:
+            appended_count += self._append_batch(sheet, batch, appended_count)
 
         logger.info(
             "총 리뷰: %d개 / 기존: %d개 / 신규: %d개",
-            len(all_reviews),
+            total_reviews,
             len(existing_ids),
-            len(new_reviews),
+            new_reviews,
         )
-
-        # 4. 신규 리뷰 append
-        appended_count = 0
         if new_reviews:
-            appended_count = self.append_reviews(new_reviews, results.get("collected_at", ""))
             logger.info("Google Sheets 업데이트 완료: %d개 신규 리뷰 추가", appended_count)
         else:
             logger.info("신규 리뷰가 없어 Sheets 업데이트를 건너뜁니다")
 
         return {
-            "new_reviews": len(new_reviews),
+            "new_reviews": new_reviews,
             "appended_reviews": appended_count,
-            "total_reviews": len(all_reviews),
-            "updated_products": len(results.get("products", [])),
+            "total_reviews": total_reviews,
+            "updated_products": total_products,
         }
+
+    def publish_incremental(self, results: dict) -> dict:
+        """증분 업데이트 메인 메서드 (publish_incremental_stream에 위임)"""
+        products = results.get("products", [])
+        return self.publish_incremental_stream(
+            (r for p in products for r in p.get("reviews", [])),
+            results.get("collected_at", ""),
+            total_products=len(products),
+        )
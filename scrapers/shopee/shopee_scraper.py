@@ -14,6 +14,8 @@ class ShopeeScraper:
     """Shopee 비공식 API를 사용한 리뷰 스크래퍼"""
 
     API_ENDPOINT = "/api/v4/seller_operation/get_shop_ratings_new"
+    # 요청 시작 간 최소 간격 (초) - 비공식 API rate limit 대응
+    MIN_REQUEST_INTERVAL = 1.0
 
     def __init__(self, country: str, userid: str, shopid: str):
         """
@@ -55,6 +57,7 @@ class ShopeeScraper:
         all_reviews = []
         offset = 0
         page_count = 0
+        last_request_at = None
 
         logger.info(
             f"[{self.country.upper()}] 리뷰 수집 시작: {start_date.date()} ~ {end_date.date()}"
@@ -65,6 +68,14 @@ class ShopeeScraper:
             logger.info(f"[{self.country.upper()}] 페이지 {page_count} 요청 중... (offset={offset})")
 
             try:
+                # Rate limiting: 응답 후 고정 sleep 대신 직전 요청 시작 시점 기준으로 간격 유지
+                # (응답 대기 시간이 간격에 포함되어 페이지당 RTT + 1초 → max(RTT, 1초))
+                if last_request_at is not None:
+                    wait = self.MIN_REQUEST_INTERVAL - (time.monotonic() - last_request_at)
+                    if wait > 0:
+                        time.sleep(wait)
+                last_request_at = time.monotonic()
+
                 # API 호출
                 reviews = self._fetch_page(offset, limit)
 
@@ -103,9 +114,6 @@ class ShopeeScraper:
                 # 다음 페이지
                 offset += limit
 
-                # Rate limiting
-                time.sleep(1.0)
-
             except Exception as e:
                 logger.error(f"[{self.country.upper()}] 페이지 {page_count} 수집 실패: {e}")
                 break
@@ -236,8 +244,14 @@ class ShopeeScraper:
         # 리뷰 수집
         raw_reviews = self.fetch_reviews(start_date, end_date)
 
-        # 파싱
-        parsed_reviews = [self.parse_review(r) for r in raw_reviews]
+        # 파싱 (제품 수도 같은 루프에서 집계 → 호출 측에서 리뷰 재순회 불필요)
+        parsed_reviews = []
+        product_names = set()
+        for raw in raw_reviews:
+            parsed = self.parse_review(raw)
+            parsed_reviews.append(parsed)
+            if parsed['product_name']:
+                product_names.add(parsed['product_name'])
 
         elapsed_time = time.time() - start_time
 
@@ -252,6 +266,7 @@ class ShopeeScraper:
             'collected_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'reviews': parsed_reviews,
             'total_reviews': len(parsed_reviews),
+            'unique_products': len(product_names),
             'date_range': {
                 'start': start_date.strftime('%Y-%m-%d'),
                 'end': end_date.strftime('%Y-%m-%d')
@@ -8,20 +8,20 @@ patchright 없이 일반 playwright로 동작합니다.
 사용법:
     python3 scrapers/tiktok/refresh_cookies.py              # 로컬에서 브라우저 열기 + 쿠키 저장
     python3 scrapers/tiktok/refresh_cookies.py --deploy      # 쿠키를 서버에도 전송
+    python3 scrapers/tiktok/refresh_cookies.py --if-stale    # 쿠키 만료가 임박할 때만 로그인/전송
+
+세션 만료 알림을 받았을 때는 옵션 없이 실행 (서버에서 무효화된 세션은 쿠키 만료 시각이 남아 있음)
 """
 import asyncio
-import json
 import os
+import re
 import subprocess
 import sys
+import time
+from functools import lru_cache
 from pathlib import Path
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    print("❌ playwright가 설치되어 있지 않습니다.")
-    print("   pip3 install playwright && python3 -m playwright install chromium")
-    sys.exit(1)
+import orjson
 
 
 SELLER_CENTER_URL = "https://seller-us.tiktok.com"
@@ -31,10 +31,115 @@ COOKIE_FILE = os.path.join(DATA_DIR, "cookies.json")
 # SSH alias for the production server
 SERVER_SSH = "oracle-cloud"
 SERVER_COOKIE_PATH = "/home/ubuntu/scraper/data/tiktok/cookies.json"
+# ssh/scp가 하나의 SSH 연결(handshake 1회)을 공유하도록 OpenSSH 멀티플렉싱 사용
+SSH_MUX_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=/tmp/refresh_cookies-ssh-%r@%h:%p",
+    "-o", "ControlPersist=60",
+    "-o", "ConnectTimeout=10",
+    "-o", "ServerAliveInterval=15",
+]
+# SCP 재시도: 최대 횟수 / 전체 제한 시간 (초)
+SCP_MAX_ATTEMPTS = 5
+SCP_DEADLINE_SECONDS = 180
+# --if-stale: 세션 쿠키 만료까지 이 시간 이상 남았으면 브라우저 로그인 생략
+SESSION_FRESH_HOURS = 24
+# 로그아웃 상태 URL 판별 (로그인/회원가입 페이지)
+_LOGGED_OUT = re.compile(r"/account/(?:login|register)").search
+# 로그인 세션을 나타내는 쿠키 이름 (만료 기준은 sessionid_tiktokseller)
+SESSION_COOKIE_NAMES = {"sessionid_tiktokseller", "sessionid", "sessionid_ss", "sid_tt", "sid_guard"}
+
+
+def _load_cookies() -> list:
+    """COOKIE_FILE 읽기"""
+    with open(COOKIE_FILE, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _save_cookies(cookies: list) -> None:
+    """COOKIE_FILE 쓰기 (orjson으로 bytes 바로 기록)
+
+    사람이 읽는 파일이 아니므로 들여쓰기 없는 compact JSON (서버 전송 크기 감소)
+    """
+    # 임시 파일에 쓴 뒤 os.replace로 교체 → 서버 전송/다른 프로세스가 반쯤 쓰인 파일을 읽지 않음
+    tmp_file = COOKIE_FILE + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(cookies))
+    os.replace(tmp_file, COOKIE_FILE)
+
+
+def _is_logged_in_url(url: str) -> bool:
+    """로그인/회원가입 페이지를 벗어나 Seller Center에 있으면 True"""
+    return "seller-us.tiktok.com" in url and not _LOGGED_OUT(url)
+
+
+def _scan_session_cookies(cookies: list):
+    """쿠키 목록을 한 번만 순회하여 (세션 쿠키 존재 여부, sessionid_tiktokseller 만료 epoch) 반환"""
+    session_found = False
+    sessionid_expiry = None
+    for c in cookies:
+        name = c.get("name")
+        if name in SESSION_COOKIE_NAMES:
+            session_found = True
+            if name == "sessionid_tiktokseller":
+                sessionid_expiry = c.get("expires", 0)
+    return session_found, sessionid_expiry
+
+
+@lru_cache(maxsize=4)
+def _cached_sessionid_expiry(mtime_ns: int, size: int):
+    """쿠키 파일의 sessionid_tiktokseller 만료 epoch (없거나 읽기 실패 시 None)
+
+    (mtime_ns, size)를 키로 캐시 → 파일이 다시 쓰이지 않았으면 재파싱하지 않음.
+    """
+    try:
+        cookies = _load_cookies()
+    except (OSError, ValueError):
+        return None
+    return _scan_session_cookies(cookies)[1]
+
+
+def session_fresh(threshold_hours: float = SESSION_FRESH_HOURS) -> bool:
+    """저장된 sessionid_tiktokseller 쿠키가 threshold_hours 이상 남았으면 True"""
+    try:
+        st = os.stat(COOKIE_FILE)
+    except OSError:
+        return False
+    sessionid_expiry = _cached_sessionid_expiry(st.st_mtime_ns, st.st_size)
+    if sessionid_expiry is None:
+        return False
+    remaining_hours = (sessionid_expiry - time.time()) / 3600
+    print(f"🍪 세션 쿠키 만료까지 {remaining_hours:.1f}시간")
+    return remaining_hours > threshold_hours
+
+
+def _remote_mtime():
+    """서버 쿠키 파일의 mtime (epoch 초). 확인 실패 시 None"""
+    try:
+        result = subprocess.run(
+            ["ssh", *SSH_MUX_OPTIONS, SERVER_SSH, "stat", "-c", "%Y", SERVER_COOKIE_PATH],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        if result.returncode == 0:
+            return int(result.stdout.strip())
+    except (subprocess.SubprocessError, ValueError):
+        pass
+    return None
 
 
 async def open_browser_and_wait_for_login():
     """브라우저를 열고 수동 로그인을 기다린 후 쿠키를 저장합니다."""
+    # playwright는 브라우저 로그인이 필요할 때만 import (세션이 유효하면 불필요)
+    try:
+        from playwright.async_api import async_playwright
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    except ImportError:
+        print("❌ playwright가 설치되어 있지 않습니다.")
+        print("   pip3 install playwright && python3 -m playwright install chromium")
+        return False
+
     Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
     profile_dir = os.path.join(DATA_DIR, "browser_profile_local")
     Path(profile_dir).mkdir(parents=True, exist_ok=True)
@@ -59,18 +164,17 @@ async def open_browser_and_wait_for_login():
 
     # 로그인 완료 대기 (최대 5분)
     print("⏳ 로그인 대기 중... (최대 5분)")
+    # URL 변경 이벤트로 대기 (고정 sleep 폴링 없이 로그인 즉시 진행)
     logged_in = False
-    for i in range(60):  # 5초 × 60 = 5분
-        await page.wait_for_timeout(5000)
-        current_url = page.url
-        if "/account/login" not in current_url and "/account/register" not in current_url:
-            if "seller-us.tiktok.com" in current_url:
-                logged_in = True
-                print(f"✅ 로그인 성공! URL: {current_url[:80]}")
-                break
-        if (i + 1) % 6 == 0:
-            elapsed = (i + 1) * 5
-            print(f"   ... {elapsed}초 경과, 로그인 대기 중")
+    for i in range(10):  # 30초 × 10 = 5분
+        try:
+            await page.wait_for_url(_is_logged_in_url, timeout=30000)
+        except PlaywrightTimeoutError:
+            print(f"   ... {(i + 1) * 30}초 경과, 로그인 대기 중")
+            continue
+        logged_in = True
+        print(f"✅ 로그인 성공! URL: {page.url[:80]}")
+        break
 
     if not logged_in:
         print("❌ 5분 내 로그인이 완료되지 않았습니다.")
@@ -81,9 +185,12 @@ async def open_browser_and_wait_for_login():
     # Rating 페이지 접속 테스트
     print("📋 Rating 페이지 접속 테스트...")
     await page.goto(RATING_PAGE_URL, wait_until="domcontentloaded")
-    await page.wait_for_timeout(5000)
+    try:
+        await page.wait_for_load_state("networkidle", timeout=15000)
+    except PlaywrightTimeoutError:
+        pass  # 롱폴링 등으로 networkidle에 도달하지 않아도 URL 확인은 가능
 
-    if "/account/login" in page.url or "/account/register" in page.url:
+    if not _is_logged_in_url(page.url):
         print("❌ Rating 페이지 접근 실패 — 세션이 유효하지 않습니다.")
         await context.close()
         await pw.stop()
@@ -93,50 +200,78 @@ async def open_browser_and_wait_for_login():
 
     # 쿠키 저장
     cookies = await context.cookies()
-    with open(COOKIE_FILE, "w", encoding="utf-8") as f:
-        json.dump(cookies, f, ensure_ascii=False, indent=2)
+    _save_cookies(cookies)
 
     print(f"🍪 쿠키 저장 완료: {len(cookies)}개 → {COOKIE_FILE}")
+    session_found, sessionid_expiry = _scan_session_cookies(cookies)
+    if not session_found:
+        print("⚠️  세션 쿠키가 없습니다 — 서버에서 로그인이 유지되지 않을 수 있습니다.")
+    elif sessionid_expiry:
+        print(f"   세션 만료까지 {(sessionid_expiry - time.time()) / 3600:.1f}시간")
 
     await context.close()
     await pw.stop()
     return True
 
 
-def deploy_cookies_to_server():
-    """쿠키 파일을 서버에 SCP로 전송합니다."""
+def deploy_cookies_to_server(skip_if_current: bool = False):
+    """쿠키 파일을 서버에 SCP로 전송합니다.
+
+    skip_if_current: 서버 파일이 로컬보다 최신이거나 같으면 전송 생략 (--if-stale 모드)
+    """
     if not os.path.exists(COOKIE_FILE):
         print(f"❌ 쿠키 파일 없음: {COOKIE_FILE}")
         return False
 
-    print(f"\n📤 서버로 쿠키 전송: {SERVER_SSH}:{SERVER_COOKIE_PATH}")
-    try:
-        result = subprocess.run(
-            ["scp", COOKIE_FILE, f"{SERVER_SSH}:{SERVER_COOKIE_PATH}"],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode == 0:
-            print("✅ 서버 쿠키 전송 완료!")
+    if skip_if_current:
+        remote_mtime = _remote_mtime()
+        if remote_mtime is not None and os.path.getmtime(COOKIE_FILE) <= remote_mtime:
+            print("✅ 서버 쿠키가 이미 최신입니다 (전송 생략)")
             return True
-        else:
-            print(f"❌ SCP 실패: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ 서버 전송 실패: {e}")
-        return False
+
+    print(f"\n📤 서버로 쿠키 전송: {SERVER_SSH}:{SERVER_COOKIE_PATH}")
+    # 일시적 네트워크 오류(kex_exchange_identification, reset by peer 등)는
+    # 지수 백오프(2, 4, 8, 16초...)로 재시도 - 로그인을 다시 할 필요 없음
+    deadline = time.time() + SCP_DEADLINE_SECONDS
+    for attempt in range(1, SCP_MAX_ATTEMPTS + 1):
+        try:
+            result = subprocess.run(
+                ["scp", *SSH_MUX_OPTIONS, COOKIE_FILE, f"{SERVER_SSH}:{SERVER_COOKIE_PATH}"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            if result.returncode == 0:
+                print("✅ 서버 쿠키 전송 완료!")
+                return True
+            print(f"❌ SCP 실패 ({attempt}/{SCP_MAX_ATTEMPTS}): {result.stderr.strip()}")
+        except Exception as e:
+            print(f"❌ 서버 전송 실패 ({attempt}/{SCP_MAX_ATTEMPTS}): {e}")
+
+        delay = min(2 ** attempt, 30)
+        if attempt == SCP_MAX_ATTEMPTS or time.time() + delay > deadline:
+            break
+        print(f"   {delay}초 후 재시도...")
+        time.sleep(delay)
+
+    return False
 
 
 def main():
     deploy = "--deploy" in sys.argv
+    # 쿠키 만료 시각 기준 생략은 명시적으로 요청한 경우에만
+    # (서버에서 무효화된 세션도 쿠키 만료 시각은 보통 몇 주 남아 있으므로 기본 동작은 항상 로그인)
+    if_stale = "--if-stale" in sys.argv
 
-    success = asyncio.run(open_browser_and_wait_for_login())
-    if not success:
-        sys.exit(1)
+    if if_stale and session_fresh():
+        print(f"✅ 세션 쿠키 만료까지 {SESSION_FRESH_HOURS}시간 이상 남음 → 브라우저 로그인 생략 (--if-stale)")
+    else:
+        success = asyncio.run(open_browser_and_wait_for_login())
+        if not success:
+            sys.exit(1)
 
     if deploy:
-        deploy_cookies_to_server()
+        deploy_cookies_to_server(skip_if_current=if_stale)
     else:
         print(f"\n💡 서버에 쿠키를 전송하려면:")
         print(f"   python3 scrapers/tiktok/refresh_cookies.py --deploy")
@@ -10,6 +10,7 @@ import json
 import logging
 import os
 import random
+import re
 import time
 from datetime import datetime, date
 from pathlib import Path
@@ -19,6 +20,9 @@ from patchright.async_api import async_playwright, Page, BrowserContext
 
 logger = logging.getLogger(__name__)
 
+# 로그아웃 상태 URL 판별 (로그인/회원가입 페이지로 리다이렉트됨) - 모듈 로드 시 1회 컴파일
+_LOGGED_OUT = re.compile(r"/account/(?:login|register)").search
+
 
 class TikTokShopScraper:
     """TikTok Shop Seller Center에서 리뷰를 수집하는 Patchright 기반 스크래퍼"""
@@ -64,6 +68,9 @@ class TikTokShopScraper:
         self._context: Optional[BrowserContext] = None
         self._page: Optional[Page] = None
 
+        # 로그인 제출 직후 시작하는 Gmail 인증 코드 폴링 태스크
+        self._gmail_code_task: Optional[asyncio.Task] = None
+
         # 데이터 디렉토리 생성
         Path(data_dir).mkdir(parents=True, exist_ok=True)
 
@@ -201,8 +208,11 @@ class TikTokShopScraper:
         """현재 브라우저 쿠키를 JSON 파일로 백업"""
         try:
             cookies = await self._context.cookies()
-            with open(self._cookie_file, "w", encoding="utf-8") as f:
-                json.dump(cookies, f, ensure_ascii=False, indent=2)
+            # 임시 파일에 쓴 뒤 교체 (heartbeat 등 다른 프로세스의 부분 읽기 방지)
+            tmp_file = self._cookie_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(cookies, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, self._cookie_file)
             logger.info(f"쿠키 백업 완료: {len(cookies)}개 → {self._cookie_file}")
         except Exception as e:
             logger.warning(f"쿠키 백업 실패: {e}")
@@ -255,7 +265,7 @@ class TikTokShopScraper:
             )
             await page.wait_for_timeout(8000)
             warmup_url = page.url
-            if "/account/login" not in warmup_url and "/account/register" not in warmup_url:
+            if not _LOGGED_OUT(warmup_url):
                 logger.info(f"Homepage 워밍업 성공: {warmup_url[:80]}")
             else:
                 logger.info(f"Homepage 워밍업: 세션 만료 감지. URL: {warmup_url[:80]}")
@@ -278,12 +288,12 @@ class TikTokShopScraper:
                 await self._dismiss_popups()
                 # 팝업 닫기 후 TikTok이 세션을 만료시킬 수 있으므로 URL 재확인
                 post_url = page.url
-                if "/account/login" in post_url or "/account/register" in post_url:
+                if _LOGGED_OUT(post_url):
                     logger.warning(f"팝업 처리 후 세션 만료 감지. URL: {post_url}")
                     break  # 재로그인 플로우로 전환
                 return True
             current_url = page.url
-            if "/account/login" in current_url or "/account/register" in current_url:
+            if _LOGGED_OUT(current_url):
                 break
 
         # 쿠키 만료 → 수동 쿠키 갱신 요청 (자동 로그인은 webmssdk에 의해 차단됨)
@@ -302,7 +312,7 @@ class TikTokShopScraper:
         current_url = page.url
 
         # 로그인/회원가입 페이지면 확실히 미로그인
-        if "/account/login" in current_url or "/account/register" in current_url:
+        if _LOGGED_OUT(current_url):
             return False
 
         # 페이지 콘텐츠 기반 확인 (공개 페이지 vs 인증 페이지 구분)
@@ -354,7 +364,7 @@ class TikTokShopScraper:
                     # 3초 대기 후 URL을 재확인하여 false positive 방지.
                     await page.wait_for_timeout(3000)
                     rechecked_url = page.url
-                    if "/account/login" in rechecked_url or "/account/register" in rechecked_url:
+                    if _LOGGED_OUT(rechecked_url):
                         logger.info(f"URL 재확인: 세션 만료 감지 → 미로그인. URL: {rechecked_url[:80]}")
                         return False
                     logger.info(f"URL 매칭으로 로그인 확인: {rechecked_url[:80]}")
@@ -521,6 +531,10 @@ class TikTokShopScraper:
                 await page.keyboard.press("Enter")
                 logger.info("Enter 키로 제출")
 
+            # TikTok은 제출 즉시 인증 코드 메일을 발송 → 인증 UI가 뜨기 전에 Gmail 폴링 시작
+            if self.gmail_imap_email and self.gmail_imap_app_password:
+                self._gmail_code_task = asyncio.create_task(self._get_code_from_gmail())
+
             await page.wait_for_timeout(5000)
             submit_url = page.url
             logger.info(f"제출 후 URL: {submit_url}")
@@ -649,6 +663,12 @@ class TikTokShopScraper:
             logger.error(f"로그인 오류: {e}")
             return False
 
+        finally:
+            # 사용되지 않은 Gmail 폴링 태스크 정리
+            if self._gmail_code_task and not self._gmail_code_task.done():
+                self._gmail_code_task.cancel()
+            self._gmail_code_task = None
+
     async def _react_safe_input(self, element, text: str, force_events: bool = False):
         """
         React controlled component에 안전하게 텍스트 입력.
@@ -1179,8 +1199,16 @@ class TikTokShopScraper:
             return await self._is_logged_in()
 
         # 2. Gmail IMAP으로 인증 코드 자동 읽기
+        #    (_do_login에서 미리 시작한 폴링 태스크가 있으면 그 결과 사용)
         if self.gmail_imap_email and self.gmail_imap_app_password:
-            code = await self._get_code_from_gmail()
+            task, self._gmail_code_task = self._gmail_code_task, None
+            if task is None:
+                code = await self._get_code_from_gmail()
+            else:
+                # 미리 시작한 태스크가 같은 시간 범위를 이미 폴링했으므로 재폴링하지 않음
+                code = await task
+                if not code:
+                    logger.warning("로그인 직후 시작한 Gmail 폴링에서 인증 코드를 찾지 못함")
             if code:
                 logger.info(f"Gmail IMAP에서 인증 코드 획득: {code}")
                 await self._input_verification_code(code)
@@ -1220,7 +1248,7 @@ class TikTokShopScraper:
             )
 
             logger.info("Gmail IMAP으로 인증 코드 이메일 폴링 시작...")
-            code = await reader.async_wait_for_verification_code(timeout=120, poll_interval=5)
+            code = await reader.async_wait_for_verification_code(timeout=120, poll_interval=4)
             return code
 
         except Exception as e:
@@ -1416,7 +1444,7 @@ class TikTokShopScraper:
         # 팝업 처리 후 URL 변경 감지 → 세션 복구 시도
         current_url = page.url
         if "/product/rating" not in current_url:
-            if "/account/login" in current_url or "/account/register" in current_url:
+            if _LOGGED_OUT(current_url):
                 logger.warning(f"팝업 처리 후 세션 만료 감지. 재로그인 시도. URL: {current_url}")
                 if not await self._recover_session():
                     return all_reviews
@@ -1430,7 +1458,7 @@ class TikTokShopScraper:
 
         # 캡차 처리 후에도 URL 변경 감지
         current_url = page.url
-        if "/account/login" in current_url or "/account/register" in current_url:
+        if _LOGGED_OUT(current_url):
             logger.warning(f"캡차 처리 후 세션 만료. 재로그인 시도. URL: {current_url}")
             if not await self._recover_session():
                 return all_reviews
@@ -1590,75 +1618,105 @@ class TikTokShopScraper:
 
         reviews = await page.evaluate("""
             () => {
-                const items = document.querySelectorAll('[class*="ratingListItem"]');
+                // 해시된 CSS 모듈 클래스명(예: ratingListItem__3xR7q)을 한 번만 찾아
+                // window.__tt_cls에 캐시 → 이후에는 인덱싱되는 정확한 클래스 셀렉터 사용
+                const cache = window.__tt_cls || (window.__tt_cls = {});
+                const resolve = (key) => {
+                    const pattern = new RegExp(key + '(?![A-Za-z])');
+                    for (const el of document.querySelectorAll(`[class*="${key}"]`)) {
+                        const token = Array.from(el.classList).find(c => pattern.test(c));
+                        if (token) return '.' + CSS.escape(token);
+                    }
+                    return null;
+                };
+                const sel = (key) => cache[key] || (cache[key] = resolve(key)) || `[class*="${key}"]`;
+
+                let items = document.querySelectorAll(sel('ratingListItem'));
+                if (items.length === 0 && cache.ratingListItem) {
+                    // 재배포 등으로 해시가 바뀐 경우 캐시 초기화 후 재탐색
+                    for (const key of Object.keys(cache)) delete cache[key];
+                    items = document.querySelectorAll(sel('ratingListItem'));
+                }
                 const results = [];
 
                 items.forEach(item => {
                     try {
                         // 별점: activeStar SVG 개수
-                        const starContainer = item.querySelector('[class*="ratingStar"]');
+                        const starContainer = item.querySelector(sel('ratingStar'));
                         const activeStars = starContainer
-                            ? starContainer.querySelectorAll('[class*="activeStar"]').length
+                            ? starContainer.querySelectorAll(sel('activeStar')).length
                             : 0;
 
                         // 날짜
-                        const dateEl = item.querySelector('[class*="reviewTime"]');
+                        const dateEl = item.querySelector(sel('reviewTime'));
                         const dateText = dateEl ? dateEl.textContent.trim() : '';
 
                         // 리뷰 텍스트
-                        const textEl = item.querySelector('[class*="reviewText"]');
+                        const textEl = item.querySelector(sel('reviewText'));
                         const reviewText = textEl ? textEl.textContent.trim() : '';
 
                         // 응답 수
-                        const replyCountEl = item.querySelector('[class*="replyCount"]');
+                        const replyCountEl = item.querySelector(sel('replyCount'));
                         const replyCountText = replyCountEl ? replyCountEl.textContent.trim() : '0';
 
                         // 주문 ID
-                        const orderIdEl = item.querySelector('[class*="productItemInfoOrderIdText"]');
+                        const orderIdEl = item.querySelector(sel('productItemInfoOrderIdText'));
                         const orderId = orderIdEl ? orderIdEl.textContent.trim() : '';
 
                         // 제품 ID
-                        const productIdEl = item.querySelector('[class*="productItemInfoProductId"]');
+                        const productIdEl = item.querySelector(sel('productItemInfoProductId'));
                         const productId = productIdEl ? productIdEl.textContent.trim() : '';
 
                         // 제품명
-                        const productNameEl = item.querySelector('[class*="productItemInfoName"]');
+                        const productNameEl = item.querySelector(sel('productItemInfoName'));
                         const productName = productNameEl ? productNameEl.textContent.trim() : '';
 
                         // SKU/변형
-                        const skuEl = item.querySelector('[class*="productItemInfoSku"]');
+                        const skuEl = item.querySelector(sel('productItemInfoSku'));
                         const sku = skuEl ? skuEl.textContent.trim() : '';
 
                         // 사용자명
-                        const usernameEl = item.querySelector('[class*="userNameText"]');
+                        const usernameEl = item.querySelector(sel('userNameText'));
                         const username = usernameEl ? usernameEl.textContent.trim() : '';
 
                         // 판매자 답변
-                        const replyEl = item.querySelector('[class*="sellerReply"]');
+                        const replyEl = item.querySelector(sel('sellerReply'));
                         const sellerReply = replyEl ? replyEl.textContent.trim() : '';
 
                         // 이미지 URL
                         const images = [];
-                        const imgEls = item.querySelectorAll('[class*="reviewImage"] img, [class*="mediaImage"] img');
+                        const imgEls = item.querySelectorAll(
+                            `${sel('reviewImage')} img, ${sel('mediaImage')} img`
+                        );
                         imgEls.forEach(img => {
                             if (img.src) images.push(img.src);
                         });
 
                         // 비디오 여부
-                        const hasVideo = item.querySelector('[class*="videoIcon"], [class*="playIcon"]') !== null;
+                        const hasVideo = item.querySelector(
+                            `${sel('videoIcon')}, ${sel('playIcon')}`
+                        ) !== null;
+
+                        // ID 텍스트에서 라벨 제거 (예: 'Order ID: 123' → '123')
+                        const cleanId = (text) => {
+                            const idx = text.indexOf(':');
+                            return (idx >= 0 ? text.slice(idx + 1) : text).trim();
+                        };
 
+                        // Python에서 쓰는 최종 키 이름/형식 그대로 반환 (후처리 최소화)
                         results.push({
+                            _id_source: `${orderId}-${productId}-${username}`,
+                            product_name: productName,
+                            product_id: cleanId(productId),
+                            order_id: cleanId(orderId),
+                            author: username,
                             star: activeStars,
-                            date: dateText,
                             content: reviewText,
-                            reply_count: replyCountText,
-                            order_id: orderId,
-                            product_id: productId,
-                            product_name: productName,
+                            date: dateText,
                             sku: sku,
-                            username: username,
                             seller_reply: sellerReply,
-                            image_urls: images,
+                            reply_count: replyCountText,
+                            image_urls: images.join(';'),
                             has_video: hasVideo
                         });
                     } catch (e) {
@@ -1670,31 +1728,15 @@ class TikTokShopScraper:
             }
         """)
 
-        # 후처리: review_id 생성 및 collected_at 추가
+        # 후처리: review_id 생성 및 collected_at 추가 (필드는 JS에서 이미 최종 형태)
+        # review_id: order_id + product_id + username 해시 (고유 식별자).
+        # 기존 수집 이력과 호환되도록 라벨 포함 원문 텍스트 기준 MD5 유지
         now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         parsed = []
 
         for r in reviews:
-            # review_id: order_id + product_id 해시 (고유 식별자)
-            id_source = f"{r.get('order_id', '')}-{r.get('product_id', '')}-{r.get('username', '')}"
-            review_id = hashlib.md5(id_source.encode()).hexdigest()[:16]
-
-            parsed.append({
-                "review_id": review_id,
-                "collected_at": now_str,
-                "product_name": r.get("product_name", ""),
-                "product_id": self._clean_id_text(r.get("product_id", "")),
-                "order_id": self._clean_id_text(r.get("order_id", "")),
-                "author": r.get("username", ""),
-                "star": r.get("star", 0),
-                "content": r.get("content", ""),
-                "date": r.get("date", ""),
-                "sku": r.get("sku", ""),
-                "seller_reply": r.get("seller_reply", ""),
-                "reply_count": r.get("reply_count", "0"),
-                "image_urls": ";".join(r.get("image_urls", [])),
-                "has_video": r.get("has_video", False),
-            })
+            review_id = hashlib.md5(r.pop("_id_source").encode()).hexdigest()[:16]
+            parsed.append({"review_id": review_id, "collected_at": now_str, **r})
 
         return parsed
 
@@ -1714,24 +1756,22 @@ class TikTokShopScraper:
             # JavaScript로 Next 버튼 클릭 (captcha overlay 우회)
             clicked = await page.evaluate("""
                 () => {
-                    // Next 버튼 찾기 (Arco Design 페이지네이션)
-                    const items = document.querySelectorAll('li');
-                    for (const item of items) {
-                        const title = item.getAttribute('title') || '';
-                        const ariaLabel = item.getAttribute('aria-label') || '';
-                        const text = item.textContent.trim();
-
-                        if (title === 'Next' || ariaLabel === 'Next') {
-                            // disabled 체크
-                            const classes = item.className || '';
-                            if (classes.includes('disabled') || item.getAttribute('aria-disabled') === 'true') {
-                                return false;
-                            }
-                            item.click();
-                            return true;
-                        }
+                    // Next 버튼 (Arco Design 페이지네이션) - 노드를 window.__tt_next에 캐시.
+                    // 페이지네이션이 다시 렌더링되어 DOM에서 분리된 경우에만 재탐색
+                    let item = window.__tt_next;
+                    if (!item || !item.isConnected) {
+                        item = document.querySelector('li[title="Next"], li[aria-label="Next"]');
+                        window.__tt_next = item;
+                    }
+                    if (!item) return false;
+
+                    // disabled 체크
+                    const classes = item.className || '';
+                    if (classes.includes('disabled') || item.getAttribute('aria-disabled') === 'true') {
+                        return false;
                     }
-                    return false;
+                    item.click();
+                    return true;
                 }
             """)
 
@@ -1749,13 +1789,6 @@ class TikTokShopScraper:
     # Utilities
     # =========================================================================
 
-    @staticmethod
-    def _clean_id_text(text: str) -> str:
-        """ID 텍스트에서 라벨 제거 (예: 'Order ID: 123' → '123')"""
-        if ":" in text:
-            return text.split(":", 1)[1].strip()
-        return text.strip()
-
     @staticmethod
     def _parse_date(date_str: str) -> date:
         """
@@ -12,71 +12,47 @@ credentials = Credentials.from_service_account_file(
 client = bigquery.Client(project="ax-test-jaeho", credentials=credentials)
 
 
-def run_query(sql, description):
+def run_script(sql, description):
+    """멀티 스테이트먼트 스크립트를 단일 job으로 실행하고 statement별 DML 결과 출력"""
     print(f"\n=== {description} ===")
-    print(f"SQL: {sql[:200]}...")
-    job = client.query(sql)
+    job_config = bigquery.QueryJobConfig(use_query_cache=False)
+    job = client.query(sql, job_config=job_config)
     job.result()
-    dml_stats = job._properties.get("statistics", {}).get("query", {}).get("dmlStats", {})
-    updated = int(dml_stats.get("updatedRowCount", "0"))
-    if updated:
-        print(f"  {updated:,}건 업데이트")
-    else:
-        print("  완료")
+    # 스크립트의 DML 통계는 부모 job이 아닌 child job에 기록됨
+    for child in reversed(list(client.list_jobs(parent_job=job))):
+        if child.statement_type in ("UPDATE", "MERGE", "INSERT", "DELETE"):
+            print(f"  [{child.statement_type}] {child.num_dml_affected_rows or 0:,}건 업데이트")
+        else:
+            print(f"  [{child.statement_type}] 완료")
     return job
 
 
-# 1. platform_country 컬럼 추가
-print("=== Step 1: platform_country 컬럼 추가 ===")
-try:
-    alter_sql = f"""
-    ALTER TABLE `{TABLE}`
-    ADD COLUMN platform_country STRING
-    OPTIONS(description='마켓플레이스/채널 국가코드 | Amazon: US/UK | Shopee: SG/TW/PH | TikTok: US 등')
-    """
-    job = client.query(alter_sql)
-    job.result()
-    print("  platform_country 컬럼 추가 완료")
-except Exception as e:
-    if "Already Exists" in str(e) or "Duplicate" in str(e).lower():
-        print("  platform_country 컬럼이 이미 존재합니다")
-    else:
-        raise
-
-# 2. Shopee: author_country → platform_country 이동, author_country = NULL
-run_query(f"""
-UPDATE `{TABLE}`
-SET platform_country = author_country,
-    author_country = NULL,
-    updated_at = CURRENT_TIMESTAMP()
-WHERE platform = 'shopee' AND author_country IS NOT NULL
-""", "Step 2: Shopee - author_country → platform_country 이동 + NULL 처리")
-
-# 3. Amazon: platform_country 설정
-# UK marketplace 리뷰 (UK_amazone 시트에서 온 데이터)
-# 기존 마이그레이션 시 UK_amazone은 5건, author_country=UK인 리뷰가 UK marketplace 출처
-run_query(f"""
-UPDATE `{TABLE}`
-SET platform_country = 'UK',
-    updated_at = CURRENT_TIMESTAMP()
-WHERE platform = 'amazon' AND author_country = 'UK' AND platform_country IS NULL
-""", "Step 3a: Amazon UK marketplace (author_country=UK → platform_country=UK)")
-
-# 나머지 Amazon → US marketplace
-run_query(f"""
-UPDATE `{TABLE}`
-SET platform_country = 'US',
-    updated_at = CURRENT_TIMESTAMP()
-WHERE platform = 'amazon' AND platform_country IS NULL
-""", "Step 3b: Amazon US marketplace (나머지 → platform_country=US)")
+# 1~4. 컬럼 추가 + 플랫폼별 platform_country 설정 (단일 스크립트 job)
+# - Step 1: platform_country 컬럼 추가 (이미 있으면 건너뜀)
+# - Shopee: author_country → platform_country 이동, author_country = NULL
+# - Amazon: author_country=UK 리뷰는 UK marketplace 출처 (UK_amazone 시트), 나머지는 US
+# - TikTok: US
+run_script(f"""
+BEGIN
+  ALTER TABLE `{TABLE}`
+  ADD COLUMN IF NOT EXISTS platform_country STRING
+  OPTIONS(description='마켓플레이스/채널 국가코드 | Amazon: US/UK | Shopee: SG/TW/PH | TikTok: US 등');
 
-# 4. TikTok: platform_country = US
-run_query(f"""
-UPDATE `{TABLE}`
-SET platform_country = 'US',
-    updated_at = CURRENT_TIMESTAMP()
-WHERE platform = 'tiktok' AND platform_country IS NULL
-""", "Step 4: TikTok → platform_country=US")
+  UPDATE `{TABLE}`
+  SET platform_country = CASE
+        WHEN platform = 'shopee' THEN author_country
+        WHEN platform = 'amazon' AND author_country = 'UK' THEN 'UK'
+        WHEN platform = 'amazon' THEN 'US'
+        WHEN platform = 'tiktok' THEN 'US'
+      END,
+      author_country = IF(platform = 'shopee', NULL, author_country),
+      updated_at = CURRENT_TIMESTAMP()
+  WHERE (platform = 'shopee' AND author_country IS NOT NULL)
+     OR (platform IN ('amazon', 'tiktok') AND platform_country IS NULL);
+EXCEPTION WHEN ERROR THEN
+  RAISE USING MESSAGE = FORMAT('platform_country 마이그레이션 실패: %s', @@error.message);
+END
+""", "Step 1-4: platform_country 컬럼 추가 + Shopee 이동 + Amazon UK/US + TikTok US")
 
 # 5. 최종 확인
 print("\n=== 최종 데이터 분포 ===")
@@ -86,9 +62,8 @@ FROM `{TABLE}`
 GROUP BY platform, platform_country, author_country
 ORDER BY platform, platform_country, cnt DESC
 """
-for row in client.query(query).result():
-    ac = row.author_country or 'NULL'
-    pc = row.platform_country or 'NULL'
-    print(f"  {row.platform:10s} | pc={pc:5s} | ac={ac:5s} | {row.cnt:,}건")
+df = client.query(query).to_dataframe(create_bqstorage_client=True)
+df = df.fillna({"platform_country": "NULL", "author_country": "NULL"})
+print(df.to_string(index=False))
 
 print("\n완료!")
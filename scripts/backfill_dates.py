@@ -7,8 +7,12 @@ Google Sheets 원본에서 date 데이터를 읽어 BigQuery의 NULL date를 채
 """
 import re
 import sys
-from datetime import datetime
+import uuid
+from datetime import date, datetime
+from functools import lru_cache
 
+import pandas as pd
+from dateutil.tz import tzlocal
 from google.cloud import bigquery
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
@@ -18,6 +22,23 @@ SHEETS_CREDS = 'config/service-account.json'
 BQ_CREDS = 'config/bigquery-service-account.json'
 TABLE = 'ax-test-jaeho.ax_cs.platform_reviews'
 
+# Amazon 날짜 문자열 패턴 (행마다 호출되므로 모듈 로드 시 1회 컴파일)
+# 같은 날짜 문자열이 반복되므로 파싱 함수 결과는 lru_cache로 문자열별 1회만 계산
+# 모든 패턴은 앵커(^, $, \b)로 매칭 시작 위치를 제한
+_US_DATE_RE = re.compile(r'\bon\s+(\w+) (\d{1,2}),\s*(\d{4})')    # "on Month DD, YYYY"
+_UK_DATE_RE = re.compile(r'\bon\s+(\d{1,2})\s+(\w+)\s+(\d{4})')  # "on DD Month YYYY"
+_MDY_RE = re.compile(r'^(\w+) (\d{1,2}),\s*(\d{4})$')             # "Month DD, YYYY"
+
+# Shopee submit_date / submit_time 형식 검증
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')  # "YYYY-MM-DD"
+_TIMESTAMP_RE = re.compile(r'^\d{9,11}$')          # Unix timestamp (초)
+
+# 영문 월 이름 → 월 번호 (strptime('%B') 대신 dict 조회)
+_MONTHS = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+    'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12,
+}
+
 
 def get_sheets_service():
     creds = service_account.Credentials.from_service_account_file(
@@ -34,107 +55,190 @@ def get_bq_client():
     return bigquery.Client(project='ax-test-jaeho', credentials=creds)
 
 
-def read_sheet(service, sheet_name, range_suffix=''):
-    """시트 데이터 읽기 → (headers, rows)"""
-    range_str = f"'{sheet_name}'!A:Z" if not range_suffix else f"'{sheet_name}'!{range_suffix}"
-    result = service.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=range_str
+class SheetView:
+    """시트 (headers, rows) + 헤더명 → 컬럼 인덱스 매핑 (시트당 1회 생성)"""
+    __slots__ = ('headers', 'rows', 'idx')
+
+    def __init__(self, headers, rows):
+        self.headers = headers
+        self.rows = rows
+        self.idx = {h: i for i, h in enumerate(headers)}
+
+    def get(self, row, name):
+        """행에서 헤더명으로 값 조회 (컬럼이 없거나 행이 짧으면 '')"""
+        i = self.idx.get(name, -1)
+        return row[i] if 0 <= i < len(row) else ''
+
+    def iter_columns(self, *names):
+        """지정 컬럼 값 튜플을 행마다 생성
+
+        행을 헤더 폭 + 1로 패딩 → 없는 컬럼은 마지막 빈 칸을 가리키게 하여 행마다 범위 체크 생략
+        """
+        width = len(self.headers) + 1
+        indices = [self.idx.get(name, width - 1) for name in names]
+        for row in self.rows:
+            row = row + [''] * (width - len(row))
+            yield tuple(row[i] for i in indices)
+
+    def to_frame(self, *names):
+        """지정 컬럼만 문자열 DataFrame으로 변환 (없는 컬럼은 '')"""
+        df = pd.DataFrame(self.rows)
+        columns = {}
+        for name in names:
+            i = self.idx.get(name, -1)
+            if 0 <= i < df.shape[1]:
+                columns[name] = df[i].fillna('').astype(str)
+            else:
+                columns[name] = pd.Series('', index=df.index, dtype=str)
+        return pd.DataFrame(columns, index=df.index)
+
+
+def read_sheets_batch(service, sheet_names):
+    """여러 시트를 batchGet 한 번으로 읽기 → {sheet_name: SheetView}"""
+    result = service.spreadsheets().values().batchGet(
+        spreadsheetId=SPREADSHEET_ID,
+        ranges=[f"'{name}'!A:Z" for name in sheet_names],
     ).execute()
-    values = result.get('values', [])
-    if not values:
-        return [], []
-    return values[0], values[1:]
+    sheets = {}
+    # valueRanges는 요청한 ranges 순서대로 반환됨
+    for name, value_range in zip(sheet_names, result.get('valueRanges', [])):
+        values = value_range.get('values', [])
+        sheets[name] = SheetView(values[0], values[1:]) if values else SheetView([], [])
+    return sheets
+
+
+def _to_iso_date(year, month_name, day):
+    """(연, 월 이름, 일) → 'YYYY-MM-DD'. 모르는 월 이름은 strptime으로 폴백, 잘못된 날짜는 None"""
+    try:
+        month = _MONTHS.get(month_name)
+        if month is None:
+            return datetime.strptime(f'{month_name} {day} {year}', '%B %d %Y').strftime('%Y-%m-%d')
+        return date(int(year), month, int(day)).isoformat()
+    except ValueError:
+        return None
 
 
+@lru_cache(maxsize=None)
 def parse_amazon_us_date(date_str):
     """'Reviewed in the United States on February 10, 2026' → 'YYYY-MM-DD'"""
     if not date_str:
         return None
-    # "on Month DD, YYYY"
-    m = re.search(r'on\s+(\w+ \d{1,2},\s*\d{4})', date_str)
+    m = _US_DATE_RE.search(date_str)
     if m:
-        try:
-            return datetime.strptime(m.group(1).replace('  ', ' '), '%B %d, %Y').strftime('%Y-%m-%d')
-        except ValueError:
-            pass
+        month_name, day, year = m.groups()
+        return _to_iso_date(year, month_name, day)
     return None
 
 
+@lru_cache(maxsize=None)
 def parse_amazon_uk_date(date_str):
     """'Reviewed in the United Kingdom on 9 February 2026' → 'YYYY-MM-DD'"""
     if not date_str:
         return None
-    # "on DD Month YYYY"
-    m = re.search(r'on\s+(\d{1,2}\s+\w+\s+\d{4})', date_str)
+    m = _UK_DATE_RE.search(date_str)
     if m:
-        try:
-            return datetime.strptime(m.group(1), '%d %B %Y').strftime('%Y-%m-%d')
-        except ValueError:
-            pass
+        day, month_name, year = m.groups()
+        parsed = _to_iso_date(year, month_name, day)
+        if parsed:
+            return parsed
     # 미국 형식도 시도
     return parse_amazon_us_date(date_str)
 
 
+@lru_cache(maxsize=None)
 def parse_tiktok_date(date_str):
     """'February 11, 2026' → 'YYYY-MM-DD'"""
     if not date_str:
         return None
+    date_str = date_str.strip()
+    m = _MDY_RE.match(date_str)
+    if m:
+        month_name, day, year = m.groups()
+        return _to_iso_date(year, month_name, day)
     try:
-        return datetime.strptime(date_str.strip(), '%B %d, %Y').strftime('%Y-%m-%d')
+        return datetime.strptime(date_str, '%B %d, %Y').strftime('%Y-%m-%d')
     except ValueError:
         return None
 
 
-def parse_shopee_date(submit_date, submit_time=''):
-    """submit_date='2026-02-12' 또는 submit_time=Unix timestamp → 'YYYY-MM-DD'"""
-    if submit_date and len(submit_date) == 10 and submit_date[4] == '-':
-        return submit_date
-    if submit_time and submit_time.isdigit() and len(submit_time) >= 9:
-        try:
-            return datetime.fromtimestamp(int(submit_time)).strftime('%Y-%m-%d')
-        except (ValueError, OSError):
-            pass
-    return None
+def parse_shopee_dates(submit_dates, submit_times):
+    """submit_date='2026-02-12' 또는 submit_time=Unix timestamp → 'YYYY-MM-DD' (pandas 벡터 연산)
+
+    Args:
+        submit_dates: submit_date 문자열 Series
+        submit_times: submit_time 문자열 Series (같은 index)
+
+    Returns:
+        'YYYY-MM-DD' Series (파싱 불가 행은 NaN)
+    """
+    # 1순위: submit_date가 이미 YYYY-MM-DD
+    parsed = submit_dates.where(submit_dates.str.match(_ISO_DATE_RE))
+
+    # 2순위: submit_time (9자리 이상 Unix timestamp, 로컬 시간대 기준 날짜)
+    # submit_date가 유효한 행(대부분)은 제외하고 나머지 행만 검사
+    # 값마다 해당 시점의 로컬 오프셋 적용 (서머타임 경계를 넘는 이력도 올바른 날짜)
+    submit_times = submit_times[parsed.isna()]
+    if submit_times.empty:
+        return parsed
+    seconds = pd.to_numeric(submit_times.where(submit_times.str.match(_TIMESTAMP_RE)), errors='coerce')
+    seconds = seconds[seconds.notna()]
+    if not seconds.empty:
+        local = pd.to_datetime(seconds.astype('int64'), unit='s', utc=True).dt.tz_convert(tzlocal())
+        parsed = parsed.fillna(local.dt.strftime('%Y-%m-%d'))
+    return parsed
 
 
 def batch_update_dates(bq_client, updates, platform):
-    """BigQuery에 date 일괄 업데이트 (review_id → date 매핑)"""
+    """BigQuery에 date 일괄 업데이트 (review_id → date 매핑)
+
+    (review_id, date) 쌍을 임시 테이블에 한 번에 로드한 뒤 단일 MERGE로 반영.
+    """
     if not updates:
         print(f"  [{platform}] 업데이트할 데이터 없음")
         return 0
 
-    # CASE WHEN 구문으로 일괄 UPDATE (1000건씩)
-    total_updated = 0
-    batch_size = 500
+    # 동일 review_id 중복 제거 (마지막 값 유지) - MERGE는 target 행당 source 1행만 허용
+    updates = list(dict(updates).items())
+
+    dataset = TABLE.rsplit('.', 1)[0]
+    temp_table_id = f"{dataset}._temp_date_backfill_{uuid.uuid4().hex[:8]}"
 
-    for i in range(0, len(updates), batch_size):
-        batch = updates[i:i + batch_size]
-        case_clauses = "\n".join(
-            f"    WHEN review_id = '{rid}' THEN DATE('{date}')"
-            for rid, date in batch
+    try:
+        # 1. 임시 테이블에 (review_id, date) 로드 (load job 1회)
+        load_config = bigquery.LoadJobConfig(
+            schema=[
+                bigquery.SchemaField('review_id', 'STRING', mode='REQUIRED'),
+                bigquery.SchemaField('date', 'DATE', mode='REQUIRED'),
+            ],
+            write_disposition='WRITE_TRUNCATE',
         )
-        review_ids = ", ".join(f"'{rid}'" for rid, _ in batch)
+        bq_client.load_table_from_json(
+            [{'review_id': rid, 'date': date} for rid, date in updates],
+            temp_table_id,
+            job_config=load_config,
+        ).result()
 
+        # 2. MERGE
         sql = f"""
-        UPDATE `{TABLE}`
-        SET date = CASE
-        {case_clauses}
-          ELSE date
-        END,
-        updated_at = CURRENT_TIMESTAMP()
-        WHERE platform = '{platform}'
-          AND date IS NULL
-          AND review_id IN ({review_ids})
+        MERGE `{TABLE}` T
+        USING `{temp_table_id}` S
+        ON T.review_id = S.review_id AND T.platform = @platform
+        WHEN MATCHED AND T.date IS NULL THEN
+          UPDATE SET date = S.date, updated_at = CURRENT_TIMESTAMP()
         """
-
-        job = bq_client.query(sql)
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter('platform', 'STRING', platform),
+            ]
+        )
+        job = bq_client.query(sql, job_config=job_config)
         job.result()
         dml = job._properties.get("statistics", {}).get("query", {}).get("dmlStats", {})
-        cnt = int(dml.get("updatedRowCount", "0"))
-        total_updated += cnt
-        print(f"  [{platform}] 배치 {i // batch_size + 1}: {cnt}건 업데이트")
+        return int(dml.get("updatedRowCount", "0"))
 
-    return total_updated
+    finally:
+        # 3. 임시 테이블 삭제
+        bq_client.delete_table(temp_table_id, not_found_ok=True)
 
 
 def main():
@@ -145,16 +249,15 @@ def main():
     service = get_sheets_service()
     bq = get_bq_client()
 
+    # 4개 시트를 한 번의 API 호출로 미리 읽기
+    sheets = read_sheets_batch(service, ['US_amazone', 'UK_amazone', 'shopee', 'US_TIkTOK'])
+
     # =====================================================
     # 1. US_amazone (56건 누락)
     # =====================================================
     print("\n[1/5] US_amazone 처리 중...")
-    headers, rows = read_sheet(service, 'US_amazone')
-    h_map = {h: i for i, h in enumerate(headers)}
     updates = []
-    for row in rows:
-        rid = row[h_map['Review ID']] if h_map.get('Review ID', -1) < len(row) else ''
-        date_raw = row[h_map['Date']] if h_map.get('Date', -1) < len(row) else ''
+    for rid, date_raw in sheets['US_amazone'].iter_columns('Review ID', 'Date'):
         parsed = parse_amazon_us_date(date_raw)
         if rid and parsed:
             updates.append((rid, parsed))
@@ -166,12 +269,8 @@ def main():
     # 2. UK_amazone (5건 누락)
     # =====================================================
     print("\n[2/5] UK_amazone 처리 중...")
-    headers, rows = read_sheet(service, 'UK_amazone')
-    h_map = {h: i for i, h in enumerate(headers)}
     updates = []
-    for row in rows:
-        rid = row[h_map['Review ID']] if h_map.get('Review ID', -1) < len(row) else ''
-        date_raw = row[h_map['Date']] if h_map.get('Date', -1) < len(row) else ''
+    for rid, date_raw in sheets['UK_amazone'].iter_columns('Review ID', 'Date'):
         parsed = parse_amazon_uk_date(date_raw)
         if rid and parsed:
             updates.append((rid, parsed))
@@ -183,19 +282,11 @@ def main():
     # 3. shopee (56,450건 누락)
     # =====================================================
     print("\n[3/5] shopee 처리 중...")
-    headers, rows = read_sheet(service, 'shopee')
-    h_map = {h: i for i, h in enumerate(headers)}
-    updates = []
-    for row in rows:
-        rid_idx = h_map.get('comment_id', -1)
-        sd_idx = h_map.get('submit_date', -1)
-        st_idx = h_map.get('submit_time', -1)
-        rid = row[rid_idx] if rid_idx < len(row) and rid_idx >= 0 else ''
-        sd = row[sd_idx] if sd_idx < len(row) and sd_idx >= 0 else ''
-        st = row[st_idx] if st_idx < len(row) and st_idx >= 0 else ''
-        parsed = parse_shopee_date(sd, st)
-        if rid and parsed:
-            updates.append((str(rid), parsed))
+    df = sheets['shopee'].to_frame('comment_id', 'submit_date', 'submit_time')
+    rid = df['comment_id']
+    parsed = parse_shopee_dates(df['submit_date'], df['submit_time'])
+    valid = (rid != '') & parsed.notna()
+    updates = list(zip(rid[valid], parsed[valid]))
     print(f"  파싱 성공: {len(updates):,}건")
     cnt = batch_update_dates(bq, updates, 'shopee')
     print(f"  shopee 완료: {cnt:,}건 업데이트")
@@ -204,14 +295,8 @@ def main():
     # 4. US_TIkTOK (45건 누락)
     # =====================================================
     print("\n[4/5] US_TIkTOK 처리 중...")
-    headers, rows = read_sheet(service, 'US_TIkTOK')
-    h_map = {h: i for i, h in enumerate(headers)}
     updates = []
-    for row in rows:
-        rid_idx = h_map.get('review_id', -1)
-        date_idx = h_map.get('date', -1)
-        rid = row[rid_idx] if rid_idx < len(row) and rid_idx >= 0 else ''
-        date_raw = row[date_idx] if date_idx < len(row) and date_idx >= 0 else ''
+    for rid, date_raw in sheets['US_TIkTOK'].iter_columns('review_id', 'date'):
         parsed = parse_tiktok_date(date_raw)
         if rid and parsed:
             updates.append((rid, parsed))
@@ -225,7 +310,7 @@ def main():
     print("\n" + "=" * 80)
     print("최종 date NULL 분포")
     print("=" * 80)
-    for r in bq.query(f'''
+    df = bq.query(f'''
       SELECT platform, platform_country,
         COUNTIF(date IS NULL) as null_cnt,
         COUNTIF(date IS NOT NULL) as has_cnt,
@@ -233,9 +318,10 @@ def main():
       FROM `{TABLE}`
       GROUP BY platform, platform_country
       ORDER BY platform, platform_country
-    ''').result():
-        pct = r.null_cnt / r.total * 100 if r.total else 0
-        print(f'  {r.platform:8s} {r.platform_country:4s} | null={r.null_cnt:>6,} | has={r.has_cnt:>6,} | null%={pct:.1f}%')
+    ''').to_dataframe()
+    df['platform_country'] = df['platform_country'].fillna('')
+    df['null_pct'] = (df['null_cnt'] / df['total'] * 100).round(1)
+    print(df.to_string(index=False))
 
     print("\n완료!")
 
@@ -23,45 +23,55 @@ PROJECT_ID = "ax-test-jaeho"
 DATASET_ID = "ax_cs"
 TABLE_ID = "platform_reviews"
 
-DDL = f"""
-CREATE TABLE IF NOT EXISTS `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
-(
-  review_id STRING NOT NULL OPTIONS(description='리뷰 고유 ID | Amazon: R123ABC | Shopee: cmtid | TikTok: MD5 해시'),
-  platform STRING NOT NULL OPTIONS(description='플랫폼 구분자 | 값: amazon, shopee, tiktok'),
-  collected_at TIMESTAMP NOT NULL OPTIONS(description='리뷰 수집 시각 (KST) | 파티셔닝 키'),
-  product_name STRING OPTIONS(description='제품명'),
-  product_id STRING OPTIONS(description='제품 ID | Amazon: ASIN | Shopee: itemid | TikTok: product_id'),
-  author STRING OPTIONS(description='리뷰 작성자 이름'),
-  author_country STRING OPTIONS(description='작성자 국가 | TikTok: NULL'),
-  star FLOAT64 OPTIONS(description='별점 (1.0 ~ 5.0)'),
-  title STRING OPTIONS(description='리뷰 제목 | TikTok: NULL'),
-  content STRING OPTIONS(description='리뷰 본문'),
-  date DATE OPTIONS(description='리뷰 작성 날짜'),
-  verified_purchase BOOLEAN OPTIONS(description='구매 확인 여부 | TikTok: NULL'),
-  item_type STRING OPTIONS(description='상품 옵션/변형 | TikTok: NULL'),
-  reply_content STRING OPTIONS(description='판매자 답변 | Amazon/Shopee'),
-  seller_reply STRING OPTIONS(description='판매자 답변 | TikTok 전용'),
-  reply_count INT64 OPTIONS(description='답변 개수 | TikTok 전용'),
-  image_urls STRING OPTIONS(description='이미지 URL 목록 | 세미콜론 구분'),
-  video_urls STRING OPTIONS(description='비디오 URL 목록 | TikTok: NULL'),
-  has_video BOOLEAN OPTIONS(description='비디오 포함 여부 | TikTok 전용'),
-  likes_count INT64 OPTIONS(description='좋아요 수 | TikTok: NULL'),
-  detailed_rating_product FLOAT64 OPTIONS(description='제품 품질 평점 | Shopee 전용'),
-  detailed_rating_seller FLOAT64 OPTIONS(description='판매자 서비스 평점 | Shopee 전용'),
-  detailed_rating_delivery FLOAT64 OPTIONS(description='배송 서비스 평점 | Shopee 전용'),
-  order_id STRING OPTIONS(description='주문 ID | TikTok 전용'),
-  sku STRING OPTIONS(description='SKU/상품 변형 | TikTok 전용'),
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP() OPTIONS(description='레코드 최초 생성 시각'),
-  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP() OPTIONS(description='레코드 최종 수정 시각')
-)
-PARTITION BY DATE(collected_at)
-CLUSTER BY platform, product_id, review_id
-OPTIONS(
-  description='통합 플랫폼 리뷰 데이터 (Amazon, Shopee, TikTok)',
-  require_partition_filter=FALSE,
-  labels=[("env", "production"), ("data_type", "reviews"), ("owner", "ax_cs_team")]
-)
-"""
+TABLE_DESCRIPTION = "통합 플랫폼 리뷰 데이터 (Amazon, Shopee, TikTok)"
+TABLE_LABELS = {"env": "production", "data_type": "reviews", "owner": "ax_cs_team"}
+# MERGE 조건(review_id + platform)과 클러스터 키 앞부분을 맞춰 MERGE 시 블록 pruning
+CLUSTERING_FIELDS = ["platform", "review_id", "product_id"]
+
+SCHEMA = [
+    bigquery.SchemaField("review_id", "STRING", mode="REQUIRED", description="리뷰 고유 ID | Amazon: R123ABC | Shopee: cmtid | TikTok: MD5 해시"),
+    bigquery.SchemaField("platform", "STRING", mode="REQUIRED", description="플랫폼 구분자 | 값: amazon, shopee, tiktok"),
+    bigquery.SchemaField("platform_country", "STRING", description="마켓플레이스/채널 국가코드 | Amazon: US/UK | Shopee: SG/TW/PH | TikTok: US 등"),
+    bigquery.SchemaField("collected_at", "TIMESTAMP", mode="REQUIRED", description="리뷰 수집 시각 (KST) | 파티셔닝 키"),
+    bigquery.SchemaField("product_name", "STRING", description="제품명"),
+    bigquery.SchemaField("product_id", "STRING", description="제품 ID | Amazon: ASIN | Shopee: itemid | TikTok: product_id"),
+    bigquery.SchemaField("author", "STRING", description="리뷰 작성자 이름"),
+    bigquery.SchemaField("author_country", "STRING", description="작성자 국가 | TikTok: NULL"),
+    bigquery.SchemaField("star", "FLOAT64", description="별점 (1.0 ~ 5.0)"),
+    bigquery.SchemaField("title", "STRING", description="리뷰 제목 | TikTok: NULL"),
+    bigquery.SchemaField("content", "STRING", description="리뷰 본문"),
+    bigquery.SchemaField("date", "DATE", description="리뷰 작성 날짜"),
+    bigquery.SchemaField("verified_purchase", "BOOLEAN", description="구매 확인 여부 | TikTok: NULL"),
+    bigquery.SchemaField("item_type", "STRING", description="상품 옵션/변형 | TikTok: NULL"),
+    bigquery.SchemaField("reply_content", "STRING", description="판매자 답변 | Amazon/Shopee"),
+    bigquery.SchemaField("seller_reply", "STRING", description="판매자 답변 | TikTok 전용"),
+    bigquery.SchemaField("reply_count", "INT64", description="답변 개수 | TikTok 전용"),
+    bigquery.SchemaField("image_urls", "STRING", description="이미지 URL 목록 | 세미콜론 구분"),
+    bigquery.SchemaField("video_urls", "STRING", description="비디오 URL 목록 | TikTok: NULL"),
+    bigquery.SchemaField("has_video", "BOOLEAN", description="비디오 포함 여부 | TikTok 전용"),
+    bigquery.SchemaField("likes_count", "INT64", description="좋아요 수 | TikTok: NULL"),
+    bigquery.SchemaField("detailed_rating_product", "FLOAT64", description="제품 품질 평점 | Shopee 전용"),
+    bigquery.SchemaField("detailed_rating_seller", "FLOAT64", description="판매자 서비스 평점 | Shopee 전용"),
+    bigquery.SchemaField("detailed_rating_delivery", "FLOAT64", description="배송 서비스 평점 | Shopee 전용"),
+    bigquery.SchemaField("order_id", "STRING", description="주문 ID | TikTok 전용"),
+    bigquery.SchemaField("sku", "STRING", description="SKU/상품 변형 | TikTok 전용"),
+    bigquery.SchemaField("created_at", "TIMESTAMP", default_value_expression="CURRENT_TIMESTAMP()", description="레코드 최초 생성 시각"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", default_value_expression="CURRENT_TIMESTAMP()", description="레코드 최종 수정 시각"),
+]
+
+
+def build_table() -> bigquery.Table:
+    """platform_reviews 테이블 정의 (DAY 파티셔닝 on collected_at + 클러스터링)"""
+    table = bigquery.Table(f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}", schema=SCHEMA)
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.DAY,
+        field="collected_at",
+        require_partition_filter=False,
+    )
+    table.clustering_fields = CLUSTERING_FIELDS
+    table.description = TABLE_DESCRIPTION
+    table.labels = TABLE_LABELS
+    return table
 
 
 def main():
@@ -92,12 +102,18 @@ def main():
 
     # 테이블 생성
     print(f"\n테이블 '{TABLE_ID}' 생성 중...")
-    job = client.query(DDL)
-    job.result()
+    client.create_table(build_table(), exists_ok=True)
     print(f"테이블 '{TABLE_ID}' 생성 완료!")
 
-    # 검증
+    # 기존 테이블은 create_table(exists_ok=True)로 갱신되지 않으므로 클러스터링만 별도 반영
+    # (변경 이후 적재되는 데이터부터 새 클러스터 키로 정렬됨)
     table = client.get_table(f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}")
+    if table.clustering_fields != CLUSTERING_FIELDS:
+        print(f"클러스터링 변경: {table.clustering_fields} → {CLUSTERING_FIELDS}")
+        table.clustering_fields = CLUSTERING_FIELDS
+        table = client.update_table(table, ["clustering_fields"])
+
+    # 검증
     print(f"\n검증 완료:")
     print(f"  - 컬럼 수: {len(table.schema)}")
     print(f"  - 파티셔닝: {table.time_partitioning}")
@@ -43,27 +43,37 @@ WHERE author_country IS NOT NULL
 GROUP BY author_country, platform
 ORDER BY cnt DESC
 """
+pending = 0
 for row in client.query(query).result():
     print(f"  {row.author_country:30s} | {row.platform:10s} | {row.cnt:,}건")
+    if row.author_country in UPDATES:
+        pending += row.cnt
 
-# 2. 일괄 UPDATE (CASE WHEN 사용)
-case_clauses = "\n".join(
-    f"    WHEN '{old}' THEN '{new}'" for old, new in UPDATES.items()
-)
-where_values = ", ".join(f"'{old}'" for old in UPDATES.keys())
+# 변환 대상이 없으면 (재실행 등) UPDATE / 재확인 쿼리 생략
+if not pending:
+    print("\n변환 대상 없음 - UPDATE 건너뜀")
+    sys.exit(0)
 
+# 2. 일괄 UPDATE (old/new 매핑을 배열 파라미터로 전달 → 고정 SQL 텍스트)
 update_sql = f"""
-UPDATE `{TABLE}`
-SET author_country = CASE author_country
-{case_clauses}
-    ELSE author_country
-  END,
+UPDATE `{TABLE}` t
+SET author_country = m.new_value,
   updated_at = CURRENT_TIMESTAMP()
-WHERE author_country IN ({where_values})
+FROM (
+  SELECT old_value, @new_values[OFFSET(i)] AS new_value
+  FROM UNNEST(@old_values) AS old_value WITH OFFSET i
+) m
+WHERE t.author_country = m.old_value
 """
+update_config = bigquery.QueryJobConfig(
+    query_parameters=[
+        bigquery.ArrayQueryParameter("old_values", "STRING", list(UPDATES.keys())),
+        bigquery.ArrayQueryParameter("new_values", "STRING", list(UPDATES.values())),
+    ]
+)
 
-print("\n=== UPDATE 실행 ===")
-job = client.query(update_sql)
+print(f"\n=== UPDATE 실행 (대상 {pending:,}건) ===")
+job = client.query(update_sql, job_config=update_config)
 job.result()
 
 dml_stats = job._properties.get("statistics", {}).get("query", {}).get("dmlStats", {})
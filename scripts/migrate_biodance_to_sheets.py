@@ -9,16 +9,22 @@
     GOOGLE_SHEETS_SERVICE_ACCOUNT_FILE: service-account.json 경로 (선택)
 """
 
-import json
 import logging
 import os
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.google_sheets_publisher import GoogleSheetsPublisher
+from publishers.google_sheets_publisher import GoogleSheetsPublisher
+import orjson
 from dotenv import load_dotenv
 
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
 # 환경변수 로드
 load_dotenv()
 
@@ -30,6 +36,33 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _read_metadata(json_path: str) -> dict:
+    """products 배열 이전의 최상위 스칼라 필드(collected_at, total_* 등)만 스트리밍으로 읽기"""
+    metadata = {}
+    with open(json_path, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == "products":
+                break
+            if event in ("string", "number", "boolean", "null") and "." not in prefix:
+                metadata[prefix] = value
+    return metadata
+
+
+def _iter_reviews(json_path: str):
+    """products[].reviews[]를 하나씩 스트리밍으로 yield"""
+    with open(json_path, "rb") as f:
+        yield from ijson.items(f, "products.item.reviews.item", use_float=True)
+
+
+def _load_all(json_path: str):
+    """ijson 미설치 시 폴백: 전체 로드 후 (metadata, reviews iterator) 반환"""
+    with open(json_path, "rb") as f:
+        data = orjson.loads(f.read())
+    products = data.pop("products", [])
+    reviews = (review for product in products for review in product.get("reviews", []))
+    return data, reviews
+
+
 def migrate():
     """기존 JSON 데이터를 Google Sheets로 마이그레이션"""
     # 1. JSON 파일 로드
@@ -45,8 +78,13 @@ def migrate():
         logger.error("먼저 run_biodance_reviews.py를 실행하여 데이터를 수집하세요")
         sys.exit(1)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # 리뷰는 스트리밍으로 읽어 publisher에 바로 전달 (전체 JSON을 메모리에 올리지 않음)
+    if HAS_IJSON:
+        data = _read_metadata(json_path)
+        reviews = _iter_reviews(json_path)
+    else:
+        logger.warning("ijson 미설치 → JSON 전체 로드로 폴백")
+        data, reviews = _load_all(json_path)
 
     logger.info("=" * 60)
     logger.info("마이그레이션 시작")
@@ -72,7 +110,11 @@ def migrate():
             spreadsheet_id=spreadsheet_id,
             service_account_file=service_account_file,
         )
-        stats = publisher.publish_incremental(data)
+        stats = publisher.publish_incremental_stream(
+            reviews,
+            collected_at=data.get("collected_at", ""),
+            total_products=data.get("total_products", 0),
+        )
 
         logger.info("=" * 60)
         logger.info("✅ 마이그레이션 완료!")
@@ -6,16 +6,23 @@ Google Sheets → BigQuery 마이그레이션 스크립트
 - Amazon (US자사몰): 16개 컬럼 → 27개 컬럼 (없는 필드 NULL)
 - Shopee (SG_shopee, PH_shopee): 19개 컬럼 → 27개 컬럼
 - TikTok (US_tiktok): 14개 컬럼 → 27개 컬럼 (없는 필드 NULL)
+
+사용법:
+    python scripts/migrate_sheets_to_bigquery.py [--max-workers N]
 """
 
 import logging
 import os
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 import gspread
+import orjson
 from google.oauth2.service_account import Credentials
 
 from publishers.bigquery_publisher import BigQueryPublisher
@@ -83,6 +90,9 @@ COLUMN_MAPPINGS = {
     },
 }
 
+# NDJSON 스풀 파일이 메모리에 머무는 최대 크기 (초과 시 디스크로 전환)
+NDJSON_SPOOL_MAX_SIZE = 64 << 20
+
 # 시트명 → platform_country 매핑
 SHEET_PLATFORM_COUNTRY = {
     "US자사몰": "US",
@@ -103,6 +113,11 @@ def get_sheets_client() -> gspread.Client:
     return gspread.authorize(credentials)
 
 
+def _ndjson_line(record: dict) -> bytes:
+    """레코드 → NDJSON 한 줄 (bytes). orjson으로 str 인코딩 단계 없이 바로 bytes 생성"""
+    return orjson.dumps(record) + b"\n"
+
+
 def migrate_sheet(
     sheets_client: gspread.Client,
     bq_publisher: BigQueryPublisher,
@@ -122,8 +137,10 @@ def migrate_sheet(
         logger.warning("[%s] 시트 '%s'를 찾을 수 없습니다. 건너뜁니다.", platform, sheet_name)
         return {"sheet_name": sheet_name, "platform": platform, "status": "skipped", "total": 0}
 
-    all_data = sheet.get_all_records()
-    total_rows = len(all_data)
+    # get_all_records()는 행마다 dict를 만들므로 원시 값 리스트로 읽고 인덱스로 접근
+    values = sheet.get_all_values()
+    headers, rows = (values[0], values[1:]) if values else ([], [])
+    total_rows = len(rows)
     logger.info("[%s] %s: 총 %d개 행 읽기 완료", platform, sheet_name, total_rows)
 
     if total_rows == 0:
@@ -131,84 +148,67 @@ def migrate_sheet(
         return {"sheet_name": sheet_name, "platform": platform, "status": "empty", "total": 0}
 
     # 2. 헤더 확인 (디버깅)
-    headers = list(all_data[0].keys())
     logger.info("[%s] 헤더 (%d개): %s", platform, len(headers), headers)
 
     # 3. BigQuery 스키마에 맞게 변환
-    # 레거시 시트의 경우 컬럼명 매핑 적용
+    # 레거시 시트의 경우 컬럼명 매핑 적용 (헤더 → 스키마 컬럼, 인덱스를 한 번만 계산)
     column_mapping = COLUMN_MAPPINGS.get(sheet_name, {})
+    mapped_cols = [(column_mapping.get(h, h), i) for i, h in enumerate(headers)]
+    rid_idx = next((i for key, i in mapped_cols if key == "review_id"), None)
+    if rid_idx is None:
+        logger.warning("[%s] review_id 컬럼이 없습니다. 건너뜁니다.", platform)
+        return {"sheet_name": sheet_name, "platform": platform, "status": "no_valid_reviews", "total": 0}
+
+    default_country = SHEET_PLATFORM_COUNTRY.get(sheet_name, "")
+
+    # 4. 정규화 → NDJSON 임시 파일로 스트리밍 (정규화 결과 리스트를 메모리에 쌓지 않음)
+    # collected_at: 각 행의 collected_at 값을 그대로 사용
+    # BigQueryPublisher는 행별로 collected_at을 처리합니다.
+    # 하지만 현재 publish_incremental은 단일 collected_at을 사용하므로
+    # 각 행의 collected_at을 보존하기 위해 직접 정규화합니다.
+    normalize = bq_publisher._make_normalizer(platform)
+    now_iso = datetime.now(timezone.utc).isoformat()
+    total = 0
+    with tempfile.SpooledTemporaryFile(max_size=NDJSON_SPOOL_MAX_SIZE, mode="w+b") as fh:
+        for row in rows:
+            # review_id가 비어있는 행은 건너뛰기
+            if rid_idx >= len(row) or not row[rid_idx]:
+                continue
 
-    reviews = []
-    for row in all_data:
-        review = {}
-        for key, value in row.items():
-            mapped_key = column_mapping.get(key, key)
-            review[mapped_key] = value
+            review = {key: row[i] if i < len(row) else "" for key, i in mapped_cols}
 
-        # review_id가 비어있는 행은 건너뛰기
-        if not review.get("review_id"):
-            continue
+            # 시트명 기반 platform_country 설정 (데이터에 없는 경우)
+            if not review.get("platform_country"):
+                review["platform_country"] = default_country
 
-        # 시트명 기반 platform_country 설정 (데이터에 없는 경우)
-        if not review.get("platform_country"):
-            review["platform_country"] = SHEET_PLATFORM_COUNTRY.get(sheet_name, "")
+            # 각 행의 collected_at 보존 (없으면 실행 시각)
+            normalized = normalize(review, review.get("collected_at") or now_iso)
+            fh.write(_ndjson_line(normalized))
+            total += 1
 
-        reviews.append(review)
+        logger.info("[%s] %d개 유효 리뷰 (review_id 있음)", platform, total)
 
-    logger.info("[%s] %d개 유효 리뷰 (review_id 있음)", platform, len(reviews))
+        if not total:
+            return {"sheet_name": sheet_name, "platform": platform, "status": "no_valid_reviews", "total": 0}
 
-    if not reviews:
-        return {"sheet_name": sheet_name, "platform": platform, "status": "no_valid_reviews", "total": 0}
+        # 5. BigQuery에 적재 (load job 1회 + MERGE 1회)
+        logger.info("[%s] %d개 로드 + MERGE 중...", platform, total)
+        result = bq_publisher._merge_from_file(fh)
 
-    # 4. BigQuery에 적재 (MERGE)
-    # collected_at: 각 행의 collected_at 값을 그대로 사용
-    # BigQueryPublisher는 행별로 collected_at을 처리합니다.
-    # 하지만 현재 publish_incremental은 단일 collected_at을 사용하므로
-    # 각 행의 collected_at을 보존하기 위해 직접 정규화합니다.
-    from datetime import datetime, timezone
-
-    normalized_reviews = []
-    for r in reviews:
-        # 각 행의 collected_at 보존
-        row_collected_at = r.get("collected_at", "") or datetime.now(timezone.utc).isoformat()
-        normalized = bq_publisher._normalize_review(r, platform, str(row_collected_at))
-        normalized_reviews.append(normalized)
-
-    # 배치로 MERGE 실행
-    batch_size = 1000
-    total_inserted = 0
-    total_updated = 0
-
-    for i in range(0, len(normalized_reviews), batch_size):
-        batch = normalized_reviews[i:i + batch_size]
-        batch_num = i // batch_size + 1
-        total_batches = (len(normalized_reviews) + batch_size - 1) // batch_size
-
-        logger.info(
-            "[%s] 배치 %d/%d (%d개) MERGE 중...",
-            platform, batch_num, total_batches, len(batch),
-        )
-
-        result = bq_publisher._merge_reviews(batch)
-        total_inserted += result["inserted"]
-        total_updated += result["updated"]
-
-        logger.info(
-            "[%s] 배치 %d/%d 완료: insert=%d, update=%d",
-            platform, batch_num, total_batches,
-            result["inserted"], result["updated"],
-        )
+    total_inserted = result["inserted"]
+    total_updated = result["updated"]
+    logger.info("[%s] MERGE 완료: insert=%d, update=%d", platform, total_inserted, total_updated)
 
     summary = {
         "sheet_name": sheet_name,
         "platform": platform,
         "status": "success",
-        "total": len(normalized_reviews),
+        "total": total,
         "inserted": total_inserted,
         "updated": total_updated,
     }
 
-    print(f"\n  결과: 총 {len(normalized_reviews)}개 → 삽입 {total_inserted}, 업데이트 {total_updated}")
+    print(f"\n  결과: 총 {total}개 → 삽입 {total_inserted}, 업데이트 {total_updated}")
     return summary
 
 
@@ -235,24 +235,34 @@ def main():
         credentials_file=BQ_SERVICE_ACCOUNT,
     )
 
-    # 마이그레이션 실행
-    results = []
-    for target in MIGRATION_TARGETS:
+    # 동시 실행 시트 수 (--max-workers N, 기본 1 = 순차 실행)
+    max_workers = 1
+    if '--max-workers' in sys.argv:
+        idx = sys.argv.index('--max-workers')
+        if idx + 1 < len(sys.argv):
+            max_workers = max(1, int(sys.argv[idx + 1]))
+
+    # 마이그레이션 실행 (시트별 작업은 Sheets 읽기/BigQuery job 대기 위주라 스레드로 병렬화)
+    def run_target(target: dict) -> dict:
         try:
-            result = migrate_sheet(
+            return migrate_sheet(
                 sheets_client, bq_publisher,
                 target["sheet_name"], target["platform"],
             )
-            results.append(result)
         except Exception as e:
             logger.error("[%s] %s 마이그레이션 실패: %s", target["platform"], target["sheet_name"], e)
-            results.append({
+            return {
                 "sheet_name": target["sheet_name"],
                 "platform": target["platform"],
                 "status": "error",
                 "error": str(e),
                 "total": 0,
-            })
+            }
+
+    logger.info("동시 실행 시트 수: %d", max_workers)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(MIGRATION_TARGETS))) as executor:
+        # 요약은 MIGRATION_TARGETS 순서 유지
+        results = list(executor.map(run_target, MIGRATION_TARGETS))
 
     # 최종 요약
     print("\n" + "=" * 60)
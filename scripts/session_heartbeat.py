@@ -6,16 +6,21 @@ TikTok Seller Center 세션 유지 Heartbeat.
 세션이 만료되기 전에 쿠키를 갱신하면 재로그인 + CAPTCHA를 피할 수 있습니다.
 
 사용법:
-    python scripts/session_heartbeat.py
+    python scripts/session_heartbeat.py             # 1회 실행 (cron)
+    python scripts/session_heartbeat.py --daemon    # 브라우저 유지 + 12시간마다 실행 (systemd)
+
+종료 코드 (1회 실행): 0 = 성공, 1 = 기술적 오류, 2 = 세션 만료,
+    3 = 다른 heartbeat가 쿠키 잠금을 놓지 않아 세션 미확인
 
 Cron 설정 예시 (12시간마다):
     0 */12 * * * cd /home/ubuntu/scraper && source /home/ubuntu/airflow-venv/bin/activate && DISPLAY=:99 python scripts/session_heartbeat.py
 """
 import asyncio
 import atexit
-import json
+import fcntl
 import logging
 import os
+import re
 import signal
 import subprocess
 import sys
@@ -24,7 +29,7 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from patchright.async_api import async_playwright
+import orjson
 
 logging.basicConfig(
     level=logging.INFO,
@@ -35,8 +40,26 @@ logger = logging.getLogger(__name__)
 
 DATA_DIR = os.environ.get("TIKTOK_DATA_DIR", "data/tiktok")
 COOKIE_FILE = os.path.join(DATA_DIR, "cookies.json")
+# 동시에 실행된 heartbeat(cron + 데몬 등)끼리 쿠키 파일 갱신이 겹치지 않도록 하는 잠금 파일
+COOKIE_LOCK_FILE = COOKIE_FILE + ".lock"
+# 다른 heartbeat가 잠금을 잡고 있을 때 기다리는 최대 시간 (초)
+COOKIE_LOCK_TIMEOUT_SECONDS = 120
+# heartbeat_once 결과: 잠금을 얻지 못해 세션을 확인하지 못함 (성공/만료/오류와 구분)
+SKIPPED = "skipped"
 PROFILE_DIR = os.path.join(DATA_DIR, "browser_profile")
+# 데몬은 브라우저를 계속 띄워두므로 scraper와 프로파일 잠금이 겹치지 않게 별도 프로파일 사용
+# (세션은 COOKIE_FILE로 공유)
+DAEMON_PROFILE_DIR = os.path.join(DATA_DIR, "browser_profile_heartbeat")
 SELLER_CENTER_URL = "https://seller-us.tiktok.com/homepage"
+# 로그아웃 상태 URL 판별 (로그인/회원가입 페이지로 리다이렉트됨)
+_LOGGED_OUT = re.compile(r"/account/(?:login|register)").search
+# 데몬 모드(--daemon) heartbeat 간격
+HEARTBEAT_INTERVAL_HOURS = 12
+
+# heartbeat는 쿠키만 필요하므로 페이지 렌더링용 리소스/트래커 요청은 차단
+# (document/script/xhr/fetch는 허용 → 서버의 세션 쿠키 갱신은 그대로)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_URL_KEYWORDS = ("google-analytics", "doubleclick", "tiktokv.com/tiktok/track")
 
 # GPU/DBus 크래시 방지 안정화 플래그
 STABLE_BROWSER_ARGS = [
@@ -54,6 +77,24 @@ STABLE_BROWSER_ARGS = [
 ]
 
 
+def _load_cookies() -> list:
+    """COOKIE_FILE 읽기"""
+    with open(COOKIE_FILE, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _save_cookies(cookies: list) -> None:
+    """COOKIE_FILE 쓰기 (orjson으로 bytes 바로 기록)
+
+    사람이 읽는 파일이 아니므로 들여쓰기 없는 compact JSON (서버 전송 크기 감소)
+    """
+    # 임시 파일에 쓴 뒤 os.replace로 교체 → 다른 프로세스가 반쯤 쓰인 파일을 읽지 않음
+    tmp_file = COOKIE_FILE + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(cookies))
+    os.replace(tmp_file, COOKIE_FILE)
+
+
 def _cleanup_profile_locks(profile_dir: str) -> None:
     """브라우저 프로파일 잠금 파일 삭제."""
     profile_path = Path(profile_dir)
@@ -96,22 +137,32 @@ async def _launch_context(pw, profile_dir: str, use_headless: bool):
         return await pw.chromium.launch_persistent_context(profile_dir, **launch_kwargs)
 
 
+async def _block_heavy_resources(route):
+    """이미지/폰트/CSS/트래커 요청 abort, 나머지는 통과."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        keyword in request.url for keyword in BLOCKED_URL_KEYWORDS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
 def _kill_stale_chrome():
-    """프로세스 종료 시 Chrome 정리 (atexit)."""
+    """1회 실행 종료 시 PROFILE_DIR로 띄운 Chrome만 정리 (atexit).
+
+    --user-data-dir 경로가 정확히 PROFILE_DIR인 프로세스만 대상으로 하므로
+    데몬(DAEMON_PROFILE_DIR)의 Chromium은 건드리지 않음.
+    """
+    pattern = rf"--user-data-dir=(\S*/)?{re.escape(os.path.normpath(PROFILE_DIR))}( |$)"
     try:
         subprocess.run(
-            ['pkill', '-9', '-f', 'chromium.*tiktok'],
-            capture_output=True, timeout=5,
-        )
-        subprocess.run(
-            ['pkill', '-9', '-f', 'chrome.*tiktok'],
+            ['pkill', '-9', '-f', '--', pattern],
             capture_output=True, timeout=5,
         )
     except Exception:
         pass
 
-atexit.register(_kill_stale_chrome)
-
 
 def _notify_session_expired() -> None:
     """세션 만료 시 Slack 알림 전송."""
@@ -129,13 +180,8 @@ def _notify_session_expired() -> None:
         logger.warning(f"Slack 알림 전송 실패: {e}")
 
 
-async def heartbeat():
-    """Seller Center를 방문하여 세션 쿠키를 갱신합니다."""
-    logger.info("=" * 60)
-    logger.info("TikTok 세션 Heartbeat 시작")
-    logger.info("=" * 60)
-
-    # 쿠키 파일 존재 여부 확인
+def _check_cookie_file() -> bool:
+    """쿠키 파일 존재/나이 확인. 파일이 없으면 False"""
     if not os.path.exists(COOKIE_FILE):
         logger.warning(f"쿠키 파일 없음: {COOKIE_FILE} - heartbeat 건너뜀")
         return False
@@ -147,6 +193,82 @@ async def heartbeat():
 
     if age_hours > 72:
         logger.warning(f"쿠키가 {age_hours:.1f}시간 전 - 만료 가능성 높음 (재로그인 필요)")
+    return True
+
+
+async def heartbeat_once(ctx):
+    """이미 실행 중인 컨텍스트로 Seller Center를 방문하여 세션 쿠키를 갱신합니다.
+
+    Returns:
+        True = 갱신 성공, None = 세션 만료 (컨텍스트는 닫지 않음),
+        SKIPPED = 다른 heartbeat가 COOKIE_LOCK_TIMEOUT_SECONDS 동안 잠금을 놓지 않음
+    """
+    # 다른 heartbeat가 쿠키를 갱신 중이면 끝날 때까지 기다린 뒤 직접 세션 확인
+    # (이벤트 루프를 막지 않도록 non-blocking 시도 + 1초 간격 재시도)
+    deadline = time.monotonic() + COOKIE_LOCK_TIMEOUT_SECONDS
+    with open(COOKIE_LOCK_FILE, "w") as lock:
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        f"다른 heartbeat가 {COOKIE_LOCK_TIMEOUT_SECONDS}초 넘게 쿠키 잠금 중 - 세션 확인 못 함"
+                    )
+                    return SKIPPED
+                await asyncio.sleep(1)
+        return await _refresh_cookies(ctx)
+
+
+async def _refresh_cookies(ctx):
+    """Seller Center 방문 + 쿠키 저장 (COOKIE_LOCK_FILE 잠금 상태에서 호출)."""
+    from patchright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    page = ctx.pages[0] if ctx.pages else await ctx.new_page()
+
+    # 기존 쿠키 복원 (수동 갱신된 파일도 반영되도록 매번 다시 읽음)
+    cookies = _load_cookies()
+    if cookies:
+        await ctx.add_cookies(cookies)
+        logger.info(f"쿠키 {len(cookies)}개 복원")
+
+    # Seller Center 방문 (세션 갱신)
+    logger.info(f"Seller Center 방문: {SELLER_CENTER_URL}")
+    await page.goto(SELLER_CENTER_URL, wait_until="domcontentloaded", timeout=30000)
+    # 고정 8초 대기 대신 네트워크 유휴(세션 갱신 요청 완료)까지만 대기
+    try:
+        await page.wait_for_load_state("networkidle", timeout=15000)
+    except PlaywrightTimeoutError:
+        logger.info("networkidle 대기 타임아웃 - 현재 상태로 진행")
+
+    current_url = page.url
+
+    # 로그인 상태 확인
+    if _LOGGED_OUT(current_url):
+        logger.warning(f"세션 만료됨 - 재로그인 필요. URL: {current_url}")
+        return None  # None = 세션 만료 (False = 기술적 오류와 구분)
+
+    # 쿠키 갱신 저장
+    # NOTE: Rating 페이지 방문은 scraper에서 처리.
+    # Heartbeat에서 rating 페이지를 방문하면 guard 토큰 rate-limit으로
+    # 이후 scraper가 rating 페이지를 열 때 ttp_session_expire=1 오류 발생.
+    new_cookies = await ctx.cookies()
+    _save_cookies(new_cookies)
+
+    logger.info(f"쿠키 갱신 완료: {len(new_cookies)}개 → {COOKIE_FILE}")
+    logger.info(f"세션 유효! URL: {current_url[:80]}")
+    return True
+
+
+async def heartbeat():
+    """브라우저를 실행하여 1회 heartbeat 후 종료합니다 (cron용)."""
+    logger.info("=" * 60)
+    logger.info("TikTok 세션 Heartbeat 시작")
+    logger.info("=" * 60)
+
+    if not _check_cookie_file():
+        return False
 
     Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
 
@@ -154,50 +276,22 @@ async def heartbeat():
     display = os.environ.get("DISPLAY", "")
     use_headless = not bool(display)
 
+    # patchright는 쿠키 파일 확인 후 브라우저가 필요할 때만 import
+    from patchright.async_api import async_playwright
+
     pw = await async_playwright().start()
     ctx = None
 
     try:
         ctx = await _launch_context(pw, PROFILE_DIR, use_headless)
-
-        page = ctx.pages[0] if ctx.pages else await ctx.new_page()
-
-        # 기존 쿠키 복원
-        with open(COOKIE_FILE, "r", encoding="utf-8") as f:
-            cookies = json.load(f)
-        if cookies:
-            await ctx.add_cookies(cookies)
-            logger.info(f"쿠키 {len(cookies)}개 복원")
-
-        # Seller Center 방문 (세션 갱신)
-        logger.info(f"Seller Center 방문: {SELLER_CENTER_URL}")
-        await page.goto(SELLER_CENTER_URL, wait_until="domcontentloaded", timeout=30000)
-        await page.wait_for_timeout(8000)
-
-        current_url = page.url
-
-        # 로그인 상태 확인
-        if "/account/login" in current_url or "/account/register" in current_url:
-            logger.warning(f"세션 만료됨 - 재로그인 필요. URL: {current_url}")
-            await ctx.close()
-            await pw.stop()
-            _notify_session_expired()
-            return None  # None = 세션 만료 (False = 기술적 오류와 구분)
-
-        # 쿠키 갱신 저장
-        # NOTE: Rating 페이지 방문은 scraper에서 처리.
-        # Heartbeat에서 rating 페이지를 방문하면 guard 토큰 rate-limit으로
-        # 이후 scraper가 rating 페이지를 열 때 ttp_session_expire=1 오류 발생.
-        new_cookies = await ctx.cookies()
-        with open(COOKIE_FILE, "w", encoding="utf-8") as f:
-            json.dump(new_cookies, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"쿠키 갱신 완료: {len(new_cookies)}개 → {COOKIE_FILE}")
-        logger.info(f"세션 유효! URL: {current_url[:80]}")
+        await ctx.route("**/*", _block_heavy_resources)
+        result = await heartbeat_once(ctx)
 
         await ctx.close()
         await pw.stop()
-        return True
+        if result is None:
+            _notify_session_expired()
+        return result
 
     except Exception as e:
         logger.error(f"Heartbeat 실패: {e}")
@@ -213,11 +307,59 @@ async def heartbeat():
         return False
 
 
+async def run_forever(interval_hours: float = HEARTBEAT_INTERVAL_HOURS):
+    """브라우저 컨텍스트를 유지한 채 interval_hours마다 heartbeat (데몬 모드).
+
+    매 실행마다 Chromium을 새로 띄우지 않으므로 실행 비용이 없음.
+    heartbeat 중 오류(Chromium 크래시 등)가 나면 컨텍스트를 다시 띄우고,
+    재실행도 실패하면 예외로 프로세스를 종료해 systemd (Restart=always)가 재시작하게 한다.
+    """
+    Path(DAEMON_PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+    use_headless = not bool(os.environ.get("DISPLAY", ""))
+
+    from patchright.async_api import async_playwright
+
+    async with async_playwright() as pw:
+        ctx = await _launch_context(pw, DAEMON_PROFILE_DIR, use_headless)
+        await ctx.route("**/*", _block_heavy_resources)
+        try:
+            while True:
+                logger.info("=" * 60)
+                logger.info("TikTok 세션 Heartbeat (데몬)")
+                logger.info("=" * 60)
+                if _check_cookie_file():
+                    try:
+                        result = await heartbeat_once(ctx)
+                        if result is None:
+                            _notify_session_expired()
+                    except Exception as e:
+                        logger.error(f"Heartbeat 실패: {e} - 브라우저 컨텍스트 재실행")
+                        try:
+                            await ctx.close()
+                        except Exception:
+                            pass
+                        # 재실행 실패 시 예외가 전파되어 프로세스가 비정상 종료됨
+                        ctx = await _launch_context(pw, DAEMON_PROFILE_DIR, use_headless)
+                        await ctx.route("**/*", _block_heavy_resources)
+                await asyncio.sleep(interval_hours * 3600)
+        finally:
+            await ctx.close()
+
+
 if __name__ == "__main__":
+    if "--daemon" in sys.argv:
+        asyncio.run(run_forever())
+        sys.exit(0)
+
+    atexit.register(_kill_stale_chrome)
+
     result = asyncio.run(heartbeat())
     if result is True:
         logger.info("Heartbeat 성공")
         sys.exit(0)
+    elif result == SKIPPED:
+        logger.warning("쿠키 잠금 대기 시간 초과 - 세션 미확인")
+        sys.exit(3)  # 세션 미확인: 성공(0)으로 취급하지 않음
     elif result is None:
         logger.warning("세션 만료 - 수동 쿠키 갱신 필요 (Slack 알림 전송됨)")
         sys.exit(2)  # 세션 만료: DAG에서 tiktok_reviews 차단
@@ -7,7 +7,9 @@ import logging
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
 
 from scrapers.shopee import ShopeeScraper
 from publishers.shopee_sheets_publisher import ShopeeGoogleSheetsPublisher
@@ -19,15 +21,24 @@ from config.settings import (
 
 PUBLISHER_TYPE = os.environ.get('PUBLISHER_TYPE', 'bigquery')
 
+# 수집 대상 국가 (Singapore, Philippines)
+COUNTRY_CODES = ('sg', 'ph')
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler('data/shopee_scraper.log', encoding='utf-8')
+        # 매일 cron 실행으로 로그가 무한히 커지지 않도록 10MB x 5개로 순환
+        RotatingFileHandler(
+            'data/shopee_scraper.log', maxBytes=10_000_000, backupCount=5, encoding='utf-8'
+        ),
     ]
 )
+# 요청마다 남는 라이브러리 로그 억제
+for noisy_logger in ('googleapiclient', 'urllib3'):
+    logging.getLogger(noisy_logger).setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 
@@ -92,11 +103,12 @@ def _publish_to_bigquery(country_code: str, result: dict) -> dict:
             credentials_file='config/bigquery-service-account.json',
         )
 
-        reviews = result.get('reviews', [])
-        for r in reviews:
-            r['platform_country'] = country_code.upper()
-            r['author_country'] = None
-        bq_result = publisher.publish_incremental(reviews, platform='shopee')
+        # 국가 컬럼은 리뷰 dict를 수정하지 않고 정규화 단계에서 일괄 적용
+        bq_result = publisher.publish_incremental(
+            result.get('reviews', []),
+            platform='shopee',
+            fixed_columns={'platform_country': country_code.upper(), 'author_country': None},
+        )
         logger.info(
             f"[{country_code.upper()}] BigQuery 업로드 완료: "
             f"insert={bq_result['inserted']}, update={bq_result['updated']}"
@@ -147,29 +159,22 @@ def main():
     date_str = f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}"
     results = {}
 
-    # Singapore 수집
+    # Singapore / Philippines 동시 수집 (국가별 독립 HTTP 세션, I/O 대기 위주)
     logger.info("\n" + "=" * 80)
-    logger.info("Singapore 리뷰 수집")
+    logger.info("Singapore / Philippines 리뷰 동시 수집")
     logger.info("=" * 80)
-    sg_result = scrape_shopee_country('sg')
-    if sg_result:
-        sg_publish = publish_reviews('sg', sg_result)
-        results['sg'] = {
-            'scrape': sg_result,
-            'publish': sg_publish
-        }
-
-    # Philippines 수집
-    logger.info("\n" + "=" * 80)
-    logger.info("Philippines 리뷰 수집")
-    logger.info("=" * 80)
-    ph_result = scrape_shopee_country('ph')
-    if ph_result:
-        ph_publish = publish_reviews('ph', ph_result)
-        results['ph'] = {
-            'scrape': ph_result,
-            'publish': ph_publish
-        }
+    with ThreadPoolExecutor(max_workers=len(COUNTRY_CODES)) as executor:
+        futures = {cc: executor.submit(scrape_shopee_country, cc) for cc in COUNTRY_CODES}
+        scraped = {cc: future.result() for cc, future in futures.items()}
+
+    # 업로드는 국가 순서대로 순차 실행
+    for cc in COUNTRY_CODES:
+        scrape_result = scraped[cc]
+        if scrape_result:
+            results[cc] = {
+                'scrape': scrape_result,
+                'publish': publish_reviews(cc, scrape_result),
+            }
 
     elapsed = time.time() - start_time
 
@@ -189,6 +194,18 @@ def main():
     logger.info("Shopee Daily Review Scraper 완료")
     logger.info("=" * 80)
 
+    # 두 국가 모두 수집 실패 시 일일 리포트 대신 에러 알림 (리포트 생략)
+    if not results:
+        logger.error("Singapore / Philippines 모두 수집 실패 - 에러 알림 전송")
+        try:
+            from src.slack_notifier import SlackNotifier
+            SlackNotifier().send_error_alert(
+                f"Shopee 리뷰 수집 실패: {', '.join(cc.upper() for cc in COUNTRY_CODES)} 모두 결과 없음 ({date_str})"
+            )
+        except Exception as e:
+            logger.error(f"Slack 알림 실패: {e}")
+        return results
+
     # Slack 알림
     try:
         from src.slack_notifier import SlackNotifier
@@ -197,9 +214,8 @@ def main():
         slack_results = []
         for country, data in results.items():
             scrape_data = data.get('scrape', {})
-            reviews = scrape_data.get('reviews', [])
-            review_count = len(reviews)
-            unique_products = len(set(r.get('product_name', '') for r in reviews if r.get('product_name')))
+            review_count = scrape_data.get('total_reviews', 0)
+            unique_products = scrape_data.get('unique_products', 0)
             publish_data = data.get('publish', {})
             new_count = publish_data.get('appended_reviews', 0)
             slack_results.append({
@@ -221,7 +237,9 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        results = main()
     except Exception as e:
         logger.error(f"❌ 실행 중 에러 발생: {e}", exc_info=True)
         sys.exit(1)
+    if not results:
+        sys.exit(1)  # 모든 국가 수집 실패
@@ -7,8 +7,11 @@ Airflow DAG에서 Node.js 크롤링 후 호출됨
 """
 import logging
 import sys
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from operator import itemgetter
 
+import pandas as pd
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from publishers.bigquery_publisher import BigQueryPublisher
@@ -25,6 +28,8 @@ logger = logging.getLogger(__name__)
 SPREADSHEET_ID = '1NVUVShv5tAveINA9DdB2D21z71L3tF0In5JVK6LYX9s'
 SHEET_NAME = 'shopee'
 SERVICE_ACCOUNT_FILE = 'credentials.json'  # 서버: credentials.json, 로컬: config/service-account.json
+LAST_COLUMN = 'Q'  # 크롤러 시트 컬럼 범위 A:Q
+SHEETS_EPOCH = date(1899, 12, 30)  # Sheets 날짜 serial number 기준일
 
 # BigQuery 설정
 BIGQUERY_CONFIG = {
@@ -35,6 +40,30 @@ BIGQUERY_CONFIG = {
 }
 
 
+# 시트 컬럼 → BigQuery 필드 매핑: (BigQuery 필드, 시트 헤더, 기본값)
+SHEET_COLUMN_MAP = (
+    ('review_id', 'comment_id', ''),
+    ('product_name', 'product_name', ''),
+    ('product_id', 'product_id', ''),
+    ('author', 'user_name', 'Unknown'),
+    ('platform_country', 'country', ''),
+    ('content', 'comment', ''),
+    ('item_type', 'model_name', ''),
+    ('reply_content', 'reply_comment', ''),
+    ('image_urls', 'images', ''),
+)
+
+
+def _column_letter(idx):
+    """0-based 컬럼 인덱스 → A1 표기 컬럼 문자 (0 → A, 26 → AA)"""
+    letters = ''
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
 def fetch_recent_shopee_data(days=3):
     """
     Google Sheets에서 최근 N일간의 shopee 데이터 가져오기
@@ -51,20 +80,19 @@ def fetch_recent_shopee_data(days=3):
     service = build('sheets', 'v4', credentials=credentials)
 
     logger.info(f"'{SHEET_NAME}' 시트에서 최근 {days}일 데이터 가져오는 중...")
+    sheet_values = service.spreadsheets().values()
 
-    # 전체 데이터 가져오기 (submit_date 기준 필터링)
-    result = service.spreadsheets().values().get(
+    # 1) 헤더 행만 가져와서 submit_date 컬럼 위치 확인
+    header_result = sheet_values.get(
         spreadsheetId=SPREADSHEET_ID,
-        range=f'{SHEET_NAME}!A:Q'
+        range=f'{SHEET_NAME}!A1:{LAST_COLUMN}1'
     ).execute()
-
-    values = result.get('values', [])
-    if not values:
+    header_rows = header_result.get('values', [])
+    if not header_rows:
         logger.error("시트가 비어있습니다.")
         return [], []
 
-    headers = values[0]
-    all_rows = values[1:]
+    headers = header_rows[0]
 
     # submit_date 컬럼 인덱스 찾기
     try:
@@ -73,22 +101,75 @@ def fetch_recent_shopee_data(days=3):
         logger.error("'submit_date' 컬럼을 찾을 수 없습니다.")
         return headers, []
 
+    # 2) submit_date 컬럼만 가져와서 최근 N일에 해당하는 행 번호 계산
+    # (Sheets API는 값 기준 서버 필터가 없으므로 전체 A:Q 대신 날짜 1개 컬럼만 전송)
+    date_col = _column_letter(submit_date_idx)
+    date_result = sheet_values.get(
+        spreadsheetId=SPREADSHEET_ID,
+        range=f'{SHEET_NAME}!{date_col}2:{date_col}',
+        majorDimension='COLUMNS',
+        # 날짜 셀은 표시 문자열 대신 serial number(1899-12-30 기준 일수)로 받아 파싱 없이 비교
+        # (텍스트로 저장된 셀은 문자열 그대로 반환됨)
+        valueRenderOption='UNFORMATTED_VALUE',
+        dateTimeRenderOption='SERIAL_NUMBER'
+    ).execute()
+    date_columns = date_result.get('values', [])
+    submit_dates = date_columns[0] if date_columns else []
+
     # 최근 N일 데이터 필터링
-    from datetime import date, timedelta
+    from datetime import timedelta
     cutoff_date = date.today() - timedelta(days=days)
 
+    dates = pd.Series(submit_dates, dtype=object)
+
+    # 날짜 셀(serial number)은 숫자 비교만으로 필터링
+    cutoff_serial = (cutoff_date - SHEETS_EPOCH).days
+    serials = pd.to_numeric(dates, errors='coerce')
+    recent_mask = serials >= cutoff_serial
+
+    # 텍스트 셀('YYYY-MM-DD')만 pandas 벡터 연산으로 파싱 (format 지정 → C 파서, 잘못된 값은 NaT로 제외)
+    # 같은 날짜 문자열이 리뷰 수만큼 반복되므로 cache=True로 고유 값만 한 번씩 파싱
+    # (ISO 문자열 직접 비교는 'bad' 같은 잘못된 값도 cutoff보다 크게 판정되어 사용하지 않음)
+    text_dates = dates[serials.isna()]
+    if not text_dates.empty:
+        parsed_dates = pd.to_datetime(text_dates, format='%Y-%m-%d', errors='coerce', cache=True)
+        recent_mask.loc[parsed_dates.index] = parsed_dates >= pd.Timestamp(cutoff_date)
+    matched_offsets = recent_mask[recent_mask].index.tolist()
+
+    if not matched_offsets:
+        logger.info(f"전체 {len(submit_dates):,}개 행 중 최근 {days}일: 0개 행")
+        return headers, []
+
+    # 3) 최근 행이 포함된 구간만 가져오기 (크롤러가 시트 끝에 추가하므로 보통 마지막 몇 백 행)
+    first, last = matched_offsets[0], matched_offsets[-1]
+    rows_result = sheet_values.get(
+        spreadsheetId=SPREADSHEET_ID,
+        range=f'{SHEET_NAME}!A{first + 2}:{LAST_COLUMN}{last + 2}'
+    ).execute()
+    span_rows = rows_result.get('values', [])
+
+    # 구간 내에서도 날짜가 맞는 행만 유지 (구간 중간의 오래된 행 제외)
+    # 시트 API는 뒤쪽 빈 셀을 생략하므로 헤더 폭에 맞춰 한 번만 None으로 채움
+    # (None = 셀 없음 → 변환 시 기본값 적용, '' = 빈 셀)
+    width = len(headers)
+    picks = [offset - first for offset in matched_offsets if offset - first < len(span_rows)]
+    # itemgetter 1회 호출로 구간에서 해당 행들을 한 번에 추출 (인덱스 1개면 단일 값을 반환)
+    picked_rows = itemgetter(*picks)(span_rows) if picks else ()
+    if len(picks) == 1:
+        picked_rows = (picked_rows,)
+
     filtered_rows = []
-    for row in all_rows:
-        if len(row) > submit_date_idx:
-            try:
-                row_date_str = row[submit_date_idx]
-                row_date = datetime.strptime(row_date_str, '%Y-%m-%d').date()
-                if row_date >= cutoff_date:
-                    filtered_rows.append(row)
-            except (ValueError, IndexError):
-                continue
-
-    logger.info(f"전체 {len(all_rows):,}개 행 중 최근 {days}일: {len(filtered_rows):,}개 행")
+    for row in picked_rows:
+        if len(row) < width:
+            row = row + [None] * (width - len(row))
+        elif len(row) > width:
+            row = row[:width]
+        filtered_rows.append(row)
+
+    logger.info(
+        f"전체 {len(submit_dates):,}개 행 중 최근 {days}일: {len(filtered_rows):,}개 행 "
+        f"({first + 2}~{last + 2}행 구간 조회)"
+    )
 
     return headers, filtered_rows
 
@@ -99,62 +180,59 @@ def transform_to_bigquery_format(headers, data_rows):
     """
     logger.info("BigQuery 형식으로 변환 중...")
 
-    # 헤더 인덱스 매핑
-    header_map = {h: i for i, h in enumerate(headers)}
-
-    reviews = []
-    for row in data_rows:
-        # 빈 행 스킵
-        if not row or len(row) == 0:
-            continue
-
-        # 데이터 추출 (인덱스 에러 방지)
-        def get_val(key, default=''):
-            idx = header_map.get(key, -1)
-            return row[idx] if idx != -1 and idx < len(row) else default
-
-        # submit_date를 그대로 사용 (YYYY-MM-DD 문자열)
-        # _to_date_str가 다양한 형식을 처리하므로 문자열 그대로 전달
-        review_date = get_val('submit_date') or get_val('submit_time') or ''
-
-        # rating_star 안전 변환
-        rating_star = get_val('rating_star', '0')
-        try:
-            star_value = int(float(rating_star))
-        except:
-            star_value = 0
-
-        # BigQuery 형식으로 변환
-        # country 필드는 마켓플레이스(SG/TW/PH)이므로 platform_country에 저장
-        review = {
-            'review_id': str(get_val('comment_id')),
-            'collected_at': datetime.now(),
-            'product_name': get_val('product_name'),
-            'product_id': str(get_val('product_id')),
-            'author': get_val('user_name', 'Unknown'),
-            'platform_country': get_val('country', ''),
-            'author_country': None,  # Shopee Seller Centre는 리뷰어 국가 미제공
-            'star': star_value,
-            'title': '',  # Shopee에는 title 없음
-            'content': get_val('comment'),
-            'date': review_date,
-            'verified_purchase': True,  # Shopee Seller Centre는 검증된 구매만 표시
-            'item_type': get_val('model_name'),
-            'reply_content': get_val('reply_comment'),
-            'image_urls': get_val('images'),
-            'video_urls': '',  # Shopee 크롤러는 비디오 수집 안 함
-            'likes_count': 0,
-            'detailed_rating_product': None,
-            'detailed_rating_seller': None,
-            'detailed_rating_delivery': None,
-        }
-
-        reviews.append(review)
+    # data_rows는 fetch_recent_shopee_data에서 헤더 폭으로 맞춰져 있음 (생략된 셀은 None)
+    df = pd.DataFrame(data_rows, columns=headers)
+
+    def column(name, default=''):
+        """시트 컬럼 Series (컬럼이 없거나 셀이 생략된 경우 default)"""
+        if name not in df:
+            return pd.Series(default, index=df.index, dtype=object)
+        return df[name].fillna(default)
+
+    out = pd.DataFrame(index=df.index)
+    for field, source, default in SHEET_COLUMN_MAP:
+        out[field] = column(source, default)
+    out['review_id'] = out['review_id'].astype(str)
+    out['product_id'] = out['product_id'].astype(str)
+
+    # submit_date를 그대로 사용 (YYYY-MM-DD 문자열)
+    # fetch 단계 필터가 유효한 submit_date가 있는 행만 남기므로 submit_time 대체 불필요
+    # _to_date_str가 다양한 형식을 처리하므로 문자열 그대로 전달
+    out['date'] = column('submit_date')
+
+    # rating_star 안전 변환 (숫자가 아니면 0, 소수는 버림) - 예외 처리 없는 벡터 변환, 별점 0~5라 int8
+    out['star'] = (
+        pd.to_numeric(column('rating_star', '0'), errors='coerce').fillna(0).astype('int8')
+    )
+
+    # 고정값 컬럼은 브로드캐스트
+    # country 필드는 마켓플레이스(SG/TW/PH)이므로 platform_country에 저장 (SHEET_COLUMN_MAP)
+    out['collected_at'] = datetime.now()  # 한 번의 적재에서는 모든 행이 같은 수집 시각을 가짐
+    out['author_country'] = None  # Shopee Seller Centre는 리뷰어 국가 미제공
+    out['title'] = ''  # Shopee에는 title 없음
+    out['verified_purchase'] = True  # Shopee Seller Centre는 검증된 구매만 표시
+    out['video_urls'] = ''  # Shopee 크롤러는 비디오 수집 안 함
+    out['likes_count'] = 0
+    out['detailed_rating_product'] = None
+    out['detailed_rating_seller'] = None
+    out['detailed_rating_delivery'] = None
+
+    # BigQueryPublisher는 dict 리스트를 받으므로 마지막에 한 번만 변환
+    reviews = out.to_dict('records')
 
     logger.info(f"총 {len(reviews):,}개 리뷰 변환 완료")
     return reviews
 
 
+@lru_cache(maxsize=1)
+def _get_publisher():
+    """BigQueryPublisher(클라이언트/커넥션 풀 포함)를 프로세스 내에서 재사용
+
+    Airflow 워커처럼 같은 프로세스에서 여러 번 호출될 때 인증/클라이언트 재생성을 피함.
+    """
+    return BigQueryPublisher(**BIGQUERY_CONFIG)
+
+
 def upload_to_bigquery(reviews):
     """BigQuery에 업로드 (MERGE로 중복 제거)"""
     if not reviews:
@@ -163,13 +241,7 @@ def upload_to_bigquery(reviews):
 
     logger.info(f"BigQuery에 {len(reviews):,}개 리뷰 업로드 중...")
 
-    publisher = BigQueryPublisher(
-        project_id=BIGQUERY_CONFIG['project_id'],
-        dataset_id=BIGQUERY_CONFIG['dataset_id'],
-        table_id=BIGQUERY_CONFIG['table_id'],
-        credentials_file=BIGQUERY_CONFIG['credentials_file'],
-    )
-
+    publisher = _get_publisher()
     result = publisher.publish_incremental(reviews, platform='shopee')
 
     logger.info(
@@ -4,20 +4,72 @@ BrowserSession - Single Page Architecture for Amazon Review Scraping
 debug_firefox.py의 성공 패턴을 정확히 복제:
 - 하나의 Page 인스턴스를 유지, new_page() 금지
 - goto()로만 페이지 이동
-- page.content() 최소화 (CAPTCHA 체크 시 query_selector 사용)
+- page.content() 사용 안 함 (CAPTCHA 체크는 locator/evaluate, 리뷰는 요소 HTML만 전송)
 - 네트워크 인터셉터로 CSRF 자동 캡처
 """
 
 import asyncio
-import json
+import hashlib
 import os
 import random
+import re
 from datetime import date
+from operator import itemgetter
 
+import orjson
 from playwright.async_api import async_playwright, Page, BrowserContext
 from bs4 import BeautifulSoup
 
-from src.parser import ReviewParser
+from src.parser import REVIEW_STRAINER, SOUP_PARSER, ReviewParser
+
+# 리뷰 페이지 상태 (URL, 봇 감지 문구, 리뷰 요소)를 evaluate 1회로 조회
+REVIEW_PAGE_STATE_JS = """() => ({
+    url: location.href,
+    botDetected: (document.body ? document.body.innerText : '').includes('automated access'),
+    hasReviews: !!document.querySelector('[data-hook="review"]'),
+})"""
+
+# 페이지 이동 전 첫 리뷰 ID / 첫 리뷰가 바뀌었는지 (다음 페이지 로드 완료 신호)
+FIRST_REVIEW_ID_JS = "() => document.querySelector('[data-hook=\"review\"]')?.id || ''"
+NEXT_REVIEW_PAGE_JS = """(prevId) => {
+    const review = document.querySelector('[data-hook="review"]');
+    return !!review && review.id !== prevId;
+}"""
+
+# 페이지 요소 selector (여러 곳에서 쓰는 문자열을 한 곳에서 관리)
+ACCOUNT_MENU_SELECTOR = '#nav-link-accountList'
+EMAIL_FIELD_SELECTOR = '#ap_email_login, #ap_email'
+PASSWORD_FIELD_SELECTOR = '#ap_password'
+OTP_FIELD_SELECTOR = '#auth-mfa-otpcode, input[name="otpCode"]'
+FUNCAPTCHA_SELECTOR = '#arkose-iframe, #enforcement-frame'
+REVIEW_SELECTOR = '[data-hook="review"]'
+NEXT_PAGE_SELECTOR = 'li.a-last a'
+
+# 리뷰 페이지 로딩 완료 신호: 리뷰 / 리뷰 없음 안내 / 로그인 폼 / CAPTCHA 중 하나
+REVIEW_PAGE_READY_SELECTOR = (
+    f'{REVIEW_SELECTOR}, #cm_cr-no_review, {EMAIL_FIELD_SELECTOR}, #captchacharacters'
+)
+
+# 리뷰 요소 HTML + CAPTCHA 여부를 evaluate 1회로 조회
+# (page.content()로 전체 HTML ~500KB를 CDP로 받지 않고 리뷰 요소만 전송)
+REVIEW_FRAGMENTS_JS = """() => {
+    const text = document.body ? document.body.innerText : '';
+    return {
+        captcha: /Enter the characters you see below|Type the characters|solve this puzzle/.test(text)
+            || !!document.querySelector('[src*="arkoselabs.com"]'),
+        html: Array.from(document.querySelectorAll('[data-hook="review"]'), n => n.outerHTML).join(''),
+    };
+}"""
+
+# 쿠키 dict → (name, value) (Cookie 헤더 문자열 생성용)
+_cookie_name_value = itemgetter('name', 'value')
+
+# 스크래핑 중 차단할 리소스 (ReviewParser는 HTML 텍스트만 사용)
+BLOCKED_RESOURCE_TYPES = frozenset(('image', 'media', 'font', 'stylesheet'))
+_BLOCKED_URL_RE = re.compile(r'adsystem|fls-(?:na|eu)\.amazon')
+
+# 로그인 과정 CAPTCHA 감지 selector
+CAPTCHA_SELECTOR = 'input[id*="captcha"], #captchacharacters, [class*="captcha"]'
 
 # TOTP 자동 OTP 생성
 try:
@@ -30,6 +82,12 @@ except ImportError:
 class BrowserSession:
     """단일 Page 기반 Amazon 브라우저 세션."""
 
+    # 프로세스 내 모든 세션이 공유하는 Playwright 드라이버 (US/UK 세션이 함께 떠도 1개만 기동)
+    # 영구 프로필은 region별 Chromium 프로세스가 필요하므로 Browser가 아닌 드라이버만 공유
+    _shared_playwright = None
+    _shared_refcount: int = 0
+    _shared_lock: asyncio.Lock | None = None
+
     def __init__(self, region: str = 'us'):
         """
         Args:
@@ -44,6 +102,8 @@ class BrowserSession:
                 AMAZON_BASE_URL,
                 AMAZON_EMAIL_UK,
                 AMAZON_PASSWORD_UK,
+                MIN_DELAY,
+                MAX_DELAY,
             )
             self._data_dir = DATA_DIR
             self._base_url = AMAZON_BASE_URL
@@ -51,12 +111,16 @@ class BrowserSession:
             self._password = AMAZON_PASSWORD_UK
             self._locale = 'en-GB'
             self._timezone = 'Europe/London'
+            self._min_delay = MIN_DELAY
+            self._max_delay = MAX_DELAY
         else:  # us (default)
             from config.settings import (
                 DATA_DIR,
                 AMAZON_BASE_URL,
                 AMAZON_EMAIL,
                 AMAZON_PASSWORD,
+                MIN_DELAY,
+                MAX_DELAY,
             )
             self._data_dir = DATA_DIR
             self._base_url = AMAZON_BASE_URL
@@ -64,17 +128,24 @@ class BrowserSession:
             self._password = AMAZON_PASSWORD
             self._locale = 'en-US'
             self._timezone = 'America/New_York'
+            self._min_delay = MIN_DELAY
+            self._max_delay = MAX_DELAY
 
         self._cookies_file = f'{self._data_dir}/cookies_{self._region}.json'
+        # 영구 브라우저 프로필 (쿠키/localStorage/HTTP 캐시를 실행 간 유지)
+        self._profile_dir = f'{self._data_dir}/browser_profile_{self._region}'
 
         # TOTP 시크릿 로드 (Amazon 2FA 자동 OTP)
         self._totp_secret = os.getenv('AMAZON_TOTP_SECRET', '').replace(' ', '')
 
         self._playwright = None
-        self._browser = None
         self._context: BrowserContext | None = None
         self._page: Page | None = None
         self._last_csrf: str = ''
+        self._cookie_str_cache: str = ''
+        self._cookie_str_dirty = True
+        self._session_hash: bytes = b''   # 마지막으로 저장한 세션 파일 내용의 해시
+        self._blocking = False
         self._parser = ReviewParser()
         os.makedirs(self._data_dir, exist_ok=True)
 
@@ -83,27 +154,30 @@ class BrowserSession:
     # =========================================================================
 
     async def start(self):
-        """Playwright Chromium 시작 + 단일 Page 생성."""
-        # Patchright 우선 시도: 봇 감지 우회 (자동화 마커 바이너리 레벨 제거)
-        # Amazon은 HeadlessChrome UA와 navigator.webdriver=true를 감지하므로
-        # Patchright로 이를 바이너리 레벨에서 제거
-        try:
-            from patchright.async_api import async_playwright as patchright_playwright
-            self._playwright = await patchright_playwright().start()
-            print(f"   Browser started (Patchright, {self._region.upper()})")
-        except ImportError:
-            self._playwright = await async_playwright().start()
-            print(f"   Browser started (Playwright, {self._region.upper()})")
-
-        self._browser = await self._playwright.chromium.launch(
+        """Playwright Chromium 영구 컨텍스트 시작 + 단일 Page 확보.
+
+        launch_persistent_context로 프로필 디렉토리를 재사용하므로 쿠키와 HTTP 캐시가
+        실행 간 유지됨 (Amazon 정적 리소스 디스크 캐시, 연속된 브라우저 상태).
+        """
+        self._playwright = await self._acquire_playwright()
+        print(f"   Browser started ({self._region.upper()})")
+
+        os.makedirs(self._profile_dir, exist_ok=True)
+        # 이전 세션의 잠금 파일 제거 (브라우저 크래시/강제종료 후 잔재)
+        for lock_name in ('SingletonLock', 'SingletonSocket', 'SingletonCookie'):
+            try:
+                os.remove(os.path.join(self._profile_dir, lock_name))
+            except OSError:
+                pass
+
+        self._context = await self._playwright.chromium.launch_persistent_context(
+            self._profile_dir,
             headless=True,
             args=[
                 '--disable-dev-shm-usage',
                 '--no-sandbox',
                 '--disable-blink-features=AutomationControlled',
             ],
-        )
-        self._context = await self._browser.new_context(
             viewport={'width': 1920, 'height': 1080},
             locale=self._locale,
             timezone_id=self._timezone,
@@ -113,27 +187,86 @@ class BrowserSession:
                 'Chrome/133.0.0.0 Safari/537.36'
             ),
         )
-        self._page = await self._context.new_page()  # 유일한 new_page()
-        self._page.on('request', self._on_request)   # 1회만 등록
+        # 영구 컨텍스트는 빈 탭 1개로 시작 → 그대로 사용 (없을 때만 new_page())
+        self._page = self._context.pages[0] if self._context.pages else await self._context.new_page()
+        # 컨텍스트 단위로 1회만 등록 (팝업/추가 페이지 요청도 포함)
+        self._context.on('request', self._on_request)
+        await self._set_resource_blocking(True)
 
     async def close(self):
         """브라우저 리소스 정리."""
-        if self._browser:
-            await self._browser.close()
+        if self._context:
+            await self._context.close()
         if self._playwright:
-            await self._playwright.stop()
+            await self._release_playwright()
         self._page = None
         self._context = None
-        self._browser = None
         self._playwright = None
+        self._blocking = False
+
+    @classmethod
+    async def _acquire_playwright(cls):
+        """공유 Playwright 드라이버 참조 획득 (첫 세션에서만 기동)."""
+        if cls._shared_lock is None:
+            cls._shared_lock = asyncio.Lock()
+        async with cls._shared_lock:
+            if cls._shared_refcount == 0:
+                # Patchright 우선 시도: 봇 감지 우회 (자동화 마커 바이너리 레벨 제거)
+                # Amazon은 HeadlessChrome UA와 navigator.webdriver=true를 감지하므로
+                # Patchright로 이를 바이너리 레벨에서 제거
+                try:
+                    from patchright.async_api import async_playwright as patchright_playwright
+                    cls._shared_playwright = await patchright_playwright().start()
+                    print("   Playwright driver started (Patchright)")
+                except ImportError:
+                    cls._shared_playwright = await async_playwright().start()
+                    print("   Playwright driver started (Playwright)")
+            cls._shared_refcount += 1
+            return cls._shared_playwright
+
+    @classmethod
+    async def _release_playwright(cls):
+        """공유 Playwright 드라이버 참조 해제 (마지막 세션에서 종료)."""
+        async with cls._shared_lock:
+            cls._shared_refcount -= 1
+            if cls._shared_refcount == 0:
+                await cls._shared_playwright.stop()
+                cls._shared_playwright = None
+        if cls._shared_refcount == 0:
+            # 다음 asyncio.run()의 새 이벤트 루프에서 Lock을 다시 만들도록 초기화
+            cls._shared_lock = None
 
     # =========================================================================
     # Network Interceptor
     # =========================================================================
 
+    @staticmethod
+    async def _block_resources(route, request):
+        """이미지/폰트/CSS/광고·비콘 요청은 중단, 나머지는 통과."""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or _BLOCKED_URL_RE.search(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _set_resource_blocking(self, enabled: bool):
+        """리소스 차단 라우트 등록/해제 (로그인 화면은 CSS가 필요해 잠시 해제)."""
+        if enabled == self._blocking:
+            return
+        if enabled:
+            await self._context.route('**/*', self._block_resources)
+        else:
+            await self._context.unroute('**/*', self._block_resources)
+        self._blocking = enabled
+
     def _on_request(self, request):
-        """모든 요청에서 CSRF 토큰 자동 캡처."""
-        token = request.headers.get('anti-csrftoken-a2z', '')
+        """모든 요청에서 CSRF 토큰 자동 캡처 + 페이지 이동 시 쿠키 문자열 캐시 무효화."""
+        # Set-Cookie는 response.headers에 노출되지 않으므로 쿠키가 갱신되는 페이지 이동을 기준으로 함
+        if request.is_navigation_request():
+            self._cookie_str_dirty = True
+        headers = request.headers
+        if 'anti-csrftoken-a2z' not in headers:
+            return
+        token = headers['anti-csrftoken-a2z']
         if token:
             self._last_csrf = token
 
@@ -145,63 +278,56 @@ class BrowserSession:
         """저장된 쿠키 또는 신규 로그인으로 세션 확보."""
         page = self._page
 
-        # 1) 저장된 쿠키 로드 시도
-        if os.path.exists(self._cookies_file):
-            try:
-                with open(self._cookies_file, 'r') as f:
-                    cookies = json.load(f)
+        # 1) 저장된 세션 확인 - 영구 프로필에 쿠키가 있으면 그대로 사용,
+        #    없을 때만 쿠키 파일에서 가져옴 (첫 실행 / 다른 서버에서 복사한 쿠키)
+        #    (exists 확인 없이 바로 열기 - stat 중복/TOCTOU 방지)
+        try:
+            if await self._context.cookies(self._base_url):
+                print("   Using cookies from browser profile")
+            else:
+                cookies = self._load_cookies()
                 await self._context.add_cookies(cookies)
+                self._cookie_str_dirty = True
                 print(f"   Loaded saved cookies ({len(cookies)} entries)")
 
-                # 같은 페이지에서 홈페이지 방문 → 로그인 확인
-                await page.goto(self._base_url, wait_until='domcontentloaded')
-                await page.wait_for_timeout(3000)
+            # 같은 페이지에서 홈페이지 방문 → 로그인 확인
+            # (_is_logged_in이 계정 메뉴 요소를 직접 기다리므로 고정 대기 없음)
+            await page.goto(self._base_url, wait_until='domcontentloaded')
 
-                if await self._is_logged_in(page):
-                    # 같은 페이지에서 리뷰 페이지 검증
-                    review_url = f'{self._base_url}/product-reviews/B0B2RM68G2?pageNumber=1&sortBy=recent'
-                    await page.goto(review_url, wait_until='networkidle', timeout=30000)
-                    await page.wait_for_timeout(3000)
+            if await self._is_logged_in(page):
+                # 같은 페이지에서 리뷰 페이지 검증
+                review_url = f'{self._base_url}/product-reviews/B0B2RM68G2?pageNumber=1&sortBy=recent'
+                await page.goto(review_url, wait_until='domcontentloaded', timeout=30000)
+                # 고정 3초 대기 대신 리뷰/로그인 폼/CAPTCHA 중 하나가 나타나면 바로 판정
+                await self._wait_for_any(page, REVIEW_PAGE_READY_SELECTOR, timeout=8000)
 
-                    url = page.url
-                    bot_detected = await page.query_selector('text="automated access"')
-                    has_reviews = await page.query_selector('[data-hook="review"]')
+                state = await page.evaluate(REVIEW_PAGE_STATE_JS)
+                redirected = '/ap/' in state['url']
 
-                    if '/ap/' not in url and not bot_detected and has_reviews:
-                        print("   Session valid (homepage + review page)")
-                        return True
+                if not redirected and not state['botDetected'] and state['hasReviews']:
+                    print("   Session valid (homepage + review page)")
+                    return True
 
-                    print(f"   Saved session: review access failed (redirect={'/ap/' in url})")
-                else:
-                    print("   Saved session expired")
-            except Exception as e:
-                print(f"   Failed to load cookies: {e}")
+                print(f"   Saved session: review access failed (redirect={redirected})")
+            else:
+                print("   Saved session expired")
+        except FileNotFoundError:
+            pass  # 저장된 쿠키 없음 → 신규 로그인
+        except Exception as e:
+            print(f"   Failed to load cookies: {e}")
 
         # 2) 만료된 쿠키 제거 후 신규 로그인
         await self._context.clear_cookies()
+        self._cookie_str_dirty = True
         print("   Cleared expired cookies")
 
         if not await self._do_login():
             raise Exception("Auto-login failed - check credentials or CAPTCHA")
 
-        # 3) 로그인 후 리뷰 페이지 검증 (같은 페이지에서)
-        review_url = f'{self._base_url}/product-reviews/B0B2RM68G2?pageNumber=1&sortBy=recent'
-        print("   Verifying review page access...")
-        await page.goto(review_url, wait_until='networkidle', timeout=30000)
-        await page.wait_for_timeout(3000)
+        # 리뷰 페이지 접근(로그인 리다이렉트/봇 감지)은 별도 검증 이동 없이
+        # 첫 scrape_reviews_html 호출에서 확인
 
-        url = page.url
-        if '/ap/' in url:
-            raise Exception("Review page redirected to sign-in after login")
-
-        bot_detected = await page.query_selector('text="automated access"')
-        if bot_detected:
-            raise Exception("Bot detected on review page")
-
-        has_reviews = await page.query_selector('[data-hook="review"]')
-        print(f"   Review access: {has_reviews is not None}")
-
-        # 4) 쿠키 저장
+        # 3) 쿠키 저장
         await self._save_cookies()
         return True
 
@@ -209,41 +335,39 @@ class BrowserSession:
         """
         debug_firefox.py 플로우 정확 복제:
         Homepage → Sign In 클릭 → Email → Password → 완료
-        page.content() 사용 금지 (CAPTCHA 체크는 query_selector로)
+        page.content() 사용 금지 (CAPTCHA 체크는 locator로)
+        고정 sleep 대신 요소 등장 / URL 변경을 기다림
         """
         page = self._page
         try:
+            await self._set_resource_blocking(False)
             print("   Attempting automatic login...")
 
             # Step 1: 홈페이지
             await page.goto(self._base_url, wait_until='domcontentloaded')
-            await page.wait_for_timeout(3000)
 
-            # Step 2: Sign In 클릭
-            sign_in = await page.query_selector('#nav-link-accountList')
-            if sign_in:
-                await sign_in.click()
-                await page.wait_for_timeout(3000)
-            else:
+            # Step 2: Sign In 클릭 (locator가 클릭 가능해질 때까지 자동 대기)
+            try:
+                await page.locator(ACCOUNT_MENU_SELECTOR).click(timeout=5000)
+            except Exception:
                 await page.goto(
                     f'{self._base_url}/gp/sign-in.html',
                     wait_until='domcontentloaded',
                 )
-                await page.wait_for_timeout(3000)
 
-            # CAPTCHA 체크 (query_selector로 - page.content() 사용 안함)
-            captcha = await page.query_selector('input[id*="captcha"], #captchacharacters, [class*="captcha"]')
-            if captcha:
+            # 로그인 폼 또는 CAPTCHA가 나타날 때까지 대기 (고정 sleep 대신)
+            await self._wait_for_any(page, f'{EMAIL_FIELD_SELECTOR}, {PASSWORD_FIELD_SELECTOR}, {CAPTCHA_SELECTOR}')
+
+            # CAPTCHA 체크 (locator로 - page.content() 사용 안함)
+            if await page.locator(CAPTCHA_SELECTOR).count():
                 print("   CAPTCHA detected")
                 return False
 
             # Step 3: 이메일 입력
-            email_field = await page.query_selector('#ap_email_login')
-            if not email_field:
-                email_field = await page.query_selector('#ap_email')
-            pw_field = await page.query_selector('#ap_password')
+            email_field = page.locator(EMAIL_FIELD_SELECTOR).first
+            pw_field = page.locator(PASSWORD_FIELD_SELECTOR).first
 
-            if email_field:
+            if await email_field.count():
                 print("   Email field found -> full login flow")
                 await email_field.fill(self._email)
                 try:
@@ -251,20 +375,20 @@ class BrowserSession:
                 except Exception:
                     print("   Continue button not found")
                     return False
-                await page.wait_for_timeout(3000)
 
-                # CAPTCHA 재체크 (query_selector로)
-                captcha = await page.query_selector('input[id*="captcha"], #captchacharacters, [class*="captcha"]')
-                if captcha:
+                # 비밀번호 입력란 또는 CAPTCHA 대기
+                await self._wait_for_any(page, f'{PASSWORD_FIELD_SELECTOR}, {CAPTCHA_SELECTOR}')
+
+                # CAPTCHA 재체크
+                if await page.locator(CAPTCHA_SELECTOR).count():
                     print("   CAPTCHA detected after email")
                     return False
 
-                pw_field = await page.query_selector('#ap_password')
-                if not pw_field:
+                if not await pw_field.count():
                     print("   Password field not found after email")
                     return False
 
-            elif pw_field:
+            elif await pw_field.count():
                 print("   Password-only page detected")
             else:
                 print("   Neither email nor password field found")
@@ -277,12 +401,13 @@ class BrowserSession:
             except Exception:
                 print("   Sign in button not found")
                 return False
-            await page.wait_for_timeout(4000)
+            # 로그인 폼 페이지를 벗어날 때까지 대기 (OTP/CAPTCHA/홈 등)
+            await self._wait_for_url_leaving(page, ('/ap/signin',), timeout=15000)
             print(f"   After signin URL: {page.url}")
 
             # OTP/2FA 자동 처리 (pyotp + TOTP 시크릿)
-            otp_field = await page.query_selector('#auth-mfa-otpcode, input[name="otpCode"]')
-            if otp_field:
+            otp_field = page.locator(OTP_FIELD_SELECTOR).first
+            if await otp_field.count():
                 if HAS_PYOTP and self._totp_secret:
                     totp = pyotp.TOTP(self._totp_secret)
                     otp_code = totp.now()
@@ -290,42 +415,37 @@ class BrowserSession:
                     await otp_field.fill(otp_code)
 
                     # "Don't require OTP on this browser" 체크박스
-                    remember_cb = await page.query_selector('#auth-mfa-remember-device, input[name="rememberDevice"]')
-                    if remember_cb:
+                    remember_cb = page.locator('#auth-mfa-remember-device, input[name="rememberDevice"]').first
+                    if await remember_cb.count():
                         await remember_cb.check()
                         print("   Checked 'remember device'")
 
                     # Submit OTP
-                    submit_btn = await page.query_selector('#auth-signin-button, button[type="submit"]')
-                    if submit_btn:
+                    submit_btn = page.locator('#auth-signin-button, button[type="submit"]').first
+                    if await submit_btn.count():
                         await submit_btn.click()
-                        # MFA 페이지 탈출 대기 (최대 15초, 1초 간격 폴링)
-                        for _ in range(15):
-                            await page.wait_for_timeout(1000)
-                            current = page.url
-                            if '/ap/mfa' not in current and '/ap/signin' not in current:
-                                break
+                        # MFA 페이지 탈출 대기 (최대 15초)
+                        await self._wait_for_url_leaving(page, ('/ap/mfa', '/ap/signin'), timeout=15000)
                         print(f"   OTP submitted. URL: {page.url}")
                 else:
                     print("   2FA/OTP required but no TOTP secret configured")
                     await page.screenshot(path=f'{self._data_dir}/debug_2fa.png')
                     return False
 
-            # "approve notification" 처리 (앱 승인 요청)
-            approve_text = await page.query_selector('text="Approve the notification"')
-            if approve_text:
-                print("   App approval notification detected - waiting 30s...")
-                await page.wait_for_timeout(30000)
+            # "approve notification" 처리 (앱 승인 요청) - 승인되어 인증 페이지를 벗어날 때까지 최대 30초
+            if await page.locator('text="Approve the notification"').count():
+                print("   App approval notification detected - waiting up to 30s...")
+                await self._wait_for_url_leaving(page, ('/ap/',), timeout=30000)
 
             # Continue shopping 처리
-            cont = await page.query_selector('text="Continue shopping"')
-            if cont:
+            cont = page.locator('text="Continue shopping"').first
+            if await cont.count():
                 await cont.click()
-                await page.wait_for_timeout(2000)
+                await page.wait_for_load_state('domcontentloaded')
 
             # CAPTCHA 확인 (로그인 후)
-            captcha = await page.query_selector('input[id*="captcha"], #captchacharacters, [class*="captcha"]')
-            funcaptcha = await page.query_selector('#arkose-iframe, #enforcement-frame')
+            captcha = await page.locator(CAPTCHA_SELECTOR).count()
+            funcaptcha = await page.locator(FUNCAPTCHA_SELECTOR).count()
 
             if captcha or funcaptcha:
                 captcha_type = "FunCaptcha" if funcaptcha else "Image CAPTCHA"
@@ -356,22 +476,58 @@ class BrowserSession:
         except Exception as e:
             print(f"   Auto-login error: {e}")
             return False
+        finally:
+            await self._set_resource_blocking(True)
+
+    @staticmethod
+    async def _wait_for_any(page: Page, selector: str, timeout: int = 15000) -> None:
+        """selector 중 하나가 DOM에 나타날 때까지 대기 (타임아웃 시 그대로 진행)."""
+        try:
+            await page.locator(selector).first.wait_for(state='attached', timeout=timeout)
+        except Exception:
+            pass
+
+    @staticmethod
+    async def _wait_for_url_leaving(page: Page, fragments: tuple, timeout: int) -> None:
+        """URL에 fragments가 모두 없어질 때까지 대기 (타임아웃 시 그대로 진행)."""
+        try:
+            await page.wait_for_url(
+                lambda url: not any(f in url for f in fragments), timeout=timeout,
+            )
+        except Exception:
+            pass
 
     async def _is_logged_in(self, page: Page) -> bool:
         """Hello 텍스트로 로그인 상태 확인."""
         try:
-            await page.wait_for_selector('#nav-link-accountList', timeout=5000)
-            account_text = await page.inner_text('#nav-link-accountList')
+            await page.wait_for_selector(ACCOUNT_MENU_SELECTOR, timeout=5000)
+            account_text = await page.inner_text(ACCOUNT_MENU_SELECTOR)
             return 'Hello' in account_text and 'Sign in' not in account_text
         except Exception:
             return False
 
+    def _load_cookies(self) -> list:
+        """세션 파일에서 쿠키 읽기.
+
+        storage_state 형식({'cookies', 'origins'})과 이전 쿠키 리스트 형식 모두 지원.
+        """
+        with open(self._cookies_file, 'rb') as f:
+            state = orjson.loads(f.read())
+        return state['cookies'] if isinstance(state, dict) else state
+
     async def _save_cookies(self):
-        """현재 컨텍스트 쿠키를 파일에 저장."""
-        cookies = await self._context.cookies()
-        with open(self._cookies_file, 'w') as f:
-            json.dump(cookies, f)
-        print(f"   Session saved ({len(cookies)} cookies)")
+        """현재 컨텍스트의 storage_state(쿠키 + localStorage)를 파일에 저장."""
+        state = await self._context.storage_state()
+        blob = orjson.dumps(state)
+
+        # 마지막으로 저장한 내용과 같으면 파일 쓰기 생략 (로그인 1회에 여러 번 호출됨)
+        digest = hashlib.blake2b(blob, digest_size=16).digest()
+        if digest == self._session_hash:
+            return
+        with open(self._cookies_file, 'wb') as f:
+            f.write(blob)
+        self._session_hash = digest
+        print(f"   Session saved ({len(state['cookies'])} cookies)")
 
     # =========================================================================
     # CSRF Capture
@@ -401,7 +557,9 @@ class BrowserSession:
                 f'?pageNumber=1&sortBy=recent'
                 f'&reviewerType=all_reviews&filterByStar=all_stars'
             )
-            await page.goto(review_url, wait_until='networkidle', timeout=30000)
+            # networkidle은 광고/비콘 요청 때문에 타임아웃까지 가는 경우가 많아 DOM 준비 + 리뷰 요소로 판단
+            await page.goto(review_url, wait_until='domcontentloaded', timeout=30000)
+            await self._wait_for_any(page, REVIEW_PAGE_READY_SELECTOR)
 
             # 로그인 리다이렉트 체크
             if '/ap/' in page.url:
@@ -414,8 +572,8 @@ class BrowserSession:
 
             # CSRF 없으면 Next 버튼 클릭으로 추가 요청 유도
             if not csrf:
-                next_btn = await page.query_selector('li.a-last a')
-                if next_btn:
+                next_btn = page.locator(NEXT_PAGE_SELECTOR).first
+                if await next_btn.count():
                     await next_btn.click()
                     await page.wait_for_timeout(3000)
                     csrf = self._last_csrf
@@ -424,8 +582,8 @@ class BrowserSession:
 
             # CSRF 없는 경우 → HTML에서 리뷰 파싱
             if not csrf:
-                html = await page.content()
-                soup = BeautifulSoup(html, 'html.parser')
+                fragments = await page.evaluate(REVIEW_FRAGMENTS_JS)
+                soup = BeautifulSoup(fragments['html'], SOUP_PARSER, parse_only=REVIEW_STRAINER)
                 result['html_reviews'] = self._parser.parse_reviews(soup)
 
             mode = 'API' if csrf else f'HTML ({len(result["html_reviews"])} reviews)'
@@ -445,6 +603,7 @@ class BrowserSession:
         for attempt in range(1, max_attempts + 1):
             print(f"   Re-login attempt {attempt}/{max_attempts}...")
             await self._context.clear_cookies()
+            self._cookie_str_dirty = True
             if await self._do_login():
                 return True
             await self._page.wait_for_timeout(2000)
@@ -456,19 +615,18 @@ class BrowserSession:
     # Cookie Helper
     # =========================================================================
 
-    def get_cookie_str(self) -> str:
-        """동기적으로 마지막 캐시된 쿠키 문자열 반환 (API 호출용)."""
-        return self._cookie_str_cache
-
     async def update_cookies(self) -> str:
-        """비동기로 쿠키 갱신 후 문자열 반환."""
-        cookies = await self._context.cookies()
-        self._cookie_str_cache = '; '.join(
-            f"{c['name']}={c['value']}" for c in cookies
-        )
-        return self._cookie_str_cache
+        """쿠키 문자열 반환 (API 호출용).
 
-    _cookie_str_cache: str = ''
+        쿠키가 바뀌었을 수 있을 때(페이지 이동, 쿠키 초기화/추가)만 context.cookies()를 다시 조회.
+        """
+        if self._cookie_str_dirty:
+            cookies = await self._context.cookies()
+            self._cookie_str_cache = '; '.join(
+                f'{name}={value}' for name, value in map(_cookie_name_value, cookies)
+            )
+            self._cookie_str_dirty = False
+        return self._cookie_str_cache
 
     # =========================================================================
     # HTML Scraping (Full page crawling - no API)
@@ -500,83 +658,80 @@ class BrowserSession:
         all_reviews = []
         error_count = 0
 
-        # Region별 딜레이 설정 로드
-        if self._region == 'uk':
-            from config.settings_uk import MIN_DELAY, MAX_DELAY
-        else:
-            from config.settings import MIN_DELAY, MAX_DELAY
-
         # 첫 페이지: URL로 이동
         first_url = (
             f'{self._base_url}/product-reviews/{asin}'
             f'?pageNumber=1&sortBy=recent'
             f'&reviewerType=all_reviews&filterByStar=all_stars'
         )
-        await page.goto(first_url, wait_until='networkidle', timeout=30000)
+        # 리뷰 요소 대기는 아래 루프 첫머리에서 수행 (networkidle 대기 없음)
+        await page.goto(first_url, wait_until='domcontentloaded', timeout=30000)
 
         # 로그인 리다이렉트 체크
         if '/ap/' in page.url:
             print(f"   Session expired. Re-login...")
             if not await self.re_login():
                 return all_reviews, 'failed', 'Session expired'
-            await page.goto(first_url, wait_until='networkidle', timeout=30000)
+            await page.goto(first_url, wait_until='domcontentloaded', timeout=30000)
             if '/ap/' in page.url:
                 return all_reviews, 'failed', 'Auth redirect after re-login'
 
         for page_num in range(1, max_pages + 1):
+            delay = None
             try:
                 # 리뷰 요소 대기
                 try:
-                    await page.wait_for_selector('[data-hook="review"]', timeout=8000)
+                    await page.wait_for_selector(REVIEW_SELECTOR, timeout=8000)
                 except Exception:
+                    # 리뷰가 없는 이유가 봇 감지 페이지인지 확인 (로그인 직후 검증 이동 대신)
+                    if (await page.evaluate(REVIEW_PAGE_STATE_JS))['botDetected']:
+                        return all_reviews, 'partial' if all_reviews else 'failed', 'Bot detected'
                     print(f"   No reviews on page {page_num}. End reached.")
                     break
 
-                html = await page.content()
+                fragments = await page.evaluate(REVIEW_FRAGMENTS_JS)
 
                 # CAPTCHA 감지
-                captcha_indicators = [
-                    'Enter the characters you see below',
-                    'Type the characters',
-                    'solve this puzzle',
-                    'api.arkoselabs.com',
-                ]
-                if any(indicator in html for indicator in captcha_indicators):
+                if fragments['captcha']:
                     return all_reviews, 'partial' if all_reviews else 'failed', 'CAPTCHA detected'
 
-                # HTML 파싱
-                soup = BeautifulSoup(html, 'html.parser')
-                reviews = self._parser.parse_reviews(soup)
-
-                if not reviews:
-                    break
+                # 페이지 간 딜레이를 먼저 시작해 두고 그동안 파싱/필터링/다음 버튼 확인
+                # (페이지당 소요 시간: 파싱 + 딜레이 → max(파싱, 딜레이))
+                delay = asyncio.create_task(
+                    asyncio.sleep(random.uniform(self._min_delay, self._max_delay))
+                )
 
-                # 날짜 필터링 + 중복 제거
-                new_reviews = []
+                # 리뷰 요소 HTML만 파싱
+                soup = BeautifulSoup(fragments['html'], SOUP_PARSER, parse_only=REVIEW_STRAINER)
+                # 리뷰를 하나씩 파싱하며 날짜 추출
+                # 최신순 정렬이므로 start_date 이전 리뷰가 나오면 종료 (페이지의 나머지 리뷰는 파싱하지 않음)
+                reviews, dates = [], []
                 reached_cutoff = False
-
-                for review in reviews:
+                for review in self._parser.iter_reviews(soup):
                     review_date = review.get('date_parsed')
-                    if not review_date:
-                        continue
-
-                    review_date_only = review_date.date() if hasattr(review_date, 'date') else review_date
-                    review_id = review.get('review_id', '')
-
-                    if review_date_only < start_date:
-                        print(f"   Date cutoff ({review_date_only} < {start_date}). Stopping.")
+                    if hasattr(review_date, 'date'):
+                        review_date = review_date.date()
+                    if review_date and review_date < start_date:
+                        print(f"   Date cutoff ({review_date} < {start_date}). Stopping.")
                         reached_cutoff = True
                         break
-                    elif review_date_only > end_date:
-                        continue
+                    reviews.append(review)
+                    dates.append(review_date)
 
-                    if review_id and review_id in existing_ids:
-                        continue
+                if not reviews and not reached_cutoff:
+                    break
 
-                    review['asin'] = asin
-                    new_reviews.append(review)
-                    if review_id:
-                        existing_ids.add(review_id)
+                # 날짜 필터링 + 중복 제거 (같은 페이지 안의 중복 ID도 제거)
+                ids = [r.get('review_id', '') for r in reviews]
+                new_reviews = []
+                for r, d, rid in zip(reviews, dates, ids):
+                    if not d or d > end_date:
+                        continue
+                    if rid:
+                        if rid in existing_ids:
+                            continue
+                        existing_ids.add(rid)
+                    new_reviews.append({**r, 'asin': asin})
 
                 if new_reviews:
                     all_reviews.extend(new_reviews)
@@ -590,24 +745,21 @@ class BrowserSession:
                 error_count = 0
 
                 # "Next page" 버튼 클릭으로 다음 페이지 이동
-                await asyncio.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
-                next_link = await page.query_selector('li.a-last a')
-                if not next_link:
+                # 존재 여부만 필요하므로 ElementHandle 대신 locator.count()
+                next_link = page.locator(NEXT_PAGE_SELECTOR).first
+                if not await next_link.count():
                     print(f"   No next page button. End reached.")
                     break
 
-                try:
-                    await next_link.click()
-                    await page.wait_for_load_state('networkidle', timeout=30000)
-                except Exception:
-                    # DOM 갱신으로 element 참조 무효화 시 selector로 재시도
-                    next_link = await page.query_selector('li.a-last a')
-                    if next_link:
-                        await next_link.click()
-                        await page.wait_for_load_state('networkidle', timeout=30000)
-                    else:
-                        print(f"   No next page button after retry. End reached.")
-                        break
+                # 현재 첫 리뷰 ID를 기억해 두고, 다른 리뷰로 바뀌면 다음 페이지 로드 완료로 판단
+                # (전체 이동 / AJAX 교체 모두 대응, networkidle 대기 없음)
+                first_review_id = await page.evaluate(FIRST_REVIEW_ID_JS)
+                await delay
+                # locator는 클릭 시점에 요소를 다시 찾으므로 DOM 갱신 시 별도 재시도 불필요
+                await next_link.click()
+                await page.wait_for_function(
+                    NEXT_REVIEW_PAGE_JS, arg=first_review_id, timeout=30000,
+                )
 
             except Exception as e:
                 error_count += 1
@@ -615,6 +767,10 @@ class BrowserSession:
                 if error_count >= 3:
                     return all_reviews, 'partial' if all_reviews else 'failed', str(e)
                 await asyncio.sleep(3)
+            finally:
+                # 종료/에러로 다음 페이지로 가지 않으면 남은 딜레이 취소
+                if delay:
+                    delay.cancel()
 
         status = 'success' if all_reviews or error_count == 0 else 'failed'
         return all_reviews, status, None
@@ -7,8 +7,33 @@ Handles various date formats and locales.
 
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup, Tag
-from typing import List, Dict, Optional
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from typing import Iterator, List, Dict, Optional
+
+
+# HTML 파서 (lxml C 파서 우선, 없으면 html.parser)
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+SOUP_PARSER = 'lxml' if HAS_LXML else 'html.parser'
+# ReviewParser는 리뷰 요소 내부만 읽으므로 헤더/네비/푸터는 트리로 만들지 않음
+REVIEW_STRAINER = SoupStrainer(attrs={'data-hook': 'review'})
+
+# Precompiled patterns for the per-review hot path
+_RE_STAR_KR = re.compile(r'^별 \d개 중 [\d.]+\s*')
+_RE_STAR_EN = re.compile(r'^[\d.]+ out of 5 stars\s*')
+_RE_THUMB_SIZE = re.compile(r'\._[A-Z]{2}\d+_?\.')
+_RE_RATING_NUM = re.compile(r'([\d.]+)')
+_RE_LOC_EN = re.compile(r'in (?:the )?([A-Za-z\s]+)(?= on)')
+_RE_LOC_KR = re.compile(r'([가-힣]+)에서')
+_RE_DATE_US = re.compile(r'([A-Za-z]+)\s+(\d{1,2}),?\s+(\d{4})')
+_RE_DATE_UK = re.compile(r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})')
+_RE_DATE_KR = re.compile(r'(\d{4})년\s*(\d{1,2})월\s*(\d{1,2})일')
+_RE_NUM_COMMA = re.compile(r'([\d,]+)')
+_RE_WS = re.compile(r'\s+')
 
 
 class ReviewParser:
@@ -44,19 +69,30 @@ class ReviewParser:
         Returns:
             List of review dictionaries
         """
-        reviews = []
-        review_elements = soup.select('[data-hook="review"]')
-        
-        for elem in review_elements:
+        return list(self.iter_reviews(soup))
+
+    def iter_reviews(self, soup: BeautifulSoup) -> Iterator[Dict]:
+        """
+        Parse reviews one at a time in page order.
+
+        Callers that stop early (e.g. at a date cutoff) skip parsing
+        the remaining review elements.
+
+        Args:
+            soup: BeautifulSoup object of page HTML
+
+        Yields:
+            Review dictionaries
+        """
+        # find_all은 CSS selector 엔진을 거치지 않음 (REVIEW_STRAINER로 만든 soup에서는 최상위 노드들)
+        for elem in soup.find_all(attrs={'data-hook': 'review'}):
             try:
                 review = self._parse_single_review(elem)
-                if review:
-                    reviews.append(review)
             except Exception as e:
                 print(f"⚠️ Failed to parse review: {e}")
                 continue
-        
-        return reviews
+            if review:
+                yield review
     
     def _parse_single_review(self, elem: Tag) -> Optional[Dict]:
         """
@@ -77,8 +113,8 @@ class ReviewParser:
         title_elem = elem.select_one('[data-hook="review-title"]')
         title = self._clean_text(title_elem.get_text()) if title_elem else ''
         # Remove rating from title if present
-        title = re.sub(r'^별 \d개 중 [\d.]+\s*', '', title).strip()
-        title = re.sub(r'^[\d.]+ out of 5 stars\s*', '', title).strip()
+        title = _RE_STAR_KR.sub('', title).strip()
+        title = _RE_STAR_EN.sub('', title).strip()
         
         # Author
         author_elem = elem.select_one('.a-profile-name')
@@ -108,7 +144,7 @@ class ReviewParser:
             src = img.get('src', '')
             if src:
                 # 썸네일(_SY88, _SX88 등)을 원본 사이즈로 변환
-                full_url = re.sub(r'\._[A-Z]{2}\d+_?\.', '.', src)
+                full_url = _RE_THUMB_SIZE.sub('.', src)
                 image_urls.append(full_url)
         image_count = len(image_urls)
 
@@ -148,7 +184,7 @@ class ReviewParser:
         if rating_elem:
             rating_text = rating_elem.get_text()
             # Extract number (e.g., "5.0 out of 5 stars" or "별 5개 중 5.0")
-            match = re.search(r'([\d.]+)', rating_text)
+            match = _RE_RATING_NUM.search(rating_text)
             if match:
                 return float(match.group(1))
         return None
@@ -169,17 +205,17 @@ class ReviewParser:
         
         # Try to extract location
         # English: "in the United States"
-        loc_match = re.search(r'in (?:the )?([A-Za-z\s]+)(?= on)', date_text)
+        loc_match = _RE_LOC_EN.search(date_text)
         if loc_match:
             location = loc_match.group(1).strip()
         # Korean: "미국에서"
-        loc_match_kr = re.search(r'([가-힣]+)에서', date_text)
+        loc_match_kr = _RE_LOC_KR.search(date_text)
         if loc_match_kr:
             location = loc_match_kr.group(1).strip()
         
         # Try to parse date
         # English format (US): "January 15, 2024"
-        date_match = re.search(r'([A-Za-z]+)\s+(\d{1,2}),?\s+(\d{4})', date_text)
+        date_match = _RE_DATE_US.search(date_text)
         if date_match:
             month_name = date_match.group(1).lower()
             day = int(date_match.group(2))
@@ -193,7 +229,7 @@ class ReviewParser:
 
         # English format (UK): "29 January 2026"
         if not date_parsed:
-            date_match_uk = re.search(r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})', date_text)
+            date_match_uk = _RE_DATE_UK.search(date_text)
             if date_match_uk:
                 day = int(date_match_uk.group(1))
                 month_name = date_match_uk.group(2).lower()
@@ -206,7 +242,7 @@ class ReviewParser:
                         pass
         
         # Korean format: "2024년 1월 15일"
-        date_match_kr = re.search(r'(\d{4})년\s*(\d{1,2})월\s*(\d{1,2})일', date_text)
+        date_match_kr = _RE_DATE_KR.search(date_text)
         if date_match_kr:
             year = int(date_match_kr.group(1))
             month = int(date_match_kr.group(2))
@@ -225,7 +261,7 @@ class ReviewParser:
         
         text = elem.get_text()
         # Extract number from "X people found this helpful" or "X명이 유용하다고 평가했습니다"
-        match = re.search(r'([\d,]+)', text)
+        match = _RE_NUM_COMMA.search(text)
         if match:
             return int(match.group(1).replace(',', ''))
         return 0
@@ -235,5 +271,5 @@ class ReviewParser:
         if not text:
             return ''
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _RE_WS.sub(' ', text)
         return text.strip()
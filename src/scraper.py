@@ -23,7 +23,7 @@ from config.settings import (
     RETRY_DELAY,
     get_reviews_url,
 )
-from src.parser import ReviewParser
+from src.parser import REVIEW_STRAINER, SOUP_PARSER, ReviewParser
 from src.utils import (
     save_reviews_to_csv,
     save_checkpoint,
@@ -31,6 +31,14 @@ from src.utils import (
     print_progress
 )
 
+# CAPTCHA 페이지 감지 (문구 또는 Arkose FunCaptcha 리소스) - 결과 bool만 반환
+CAPTCHA_CHECK_JS = """() => {
+    const text = document.body ? document.body.innerText : '';
+    // 문구 3개를 정규식 alternation 1회 스캔으로 검사
+    return /Enter the characters you see below|Type the characters|solve this puzzle/.test(text)
+        || !!document.querySelector('[src*="arkoselabs.com"]');
+}"""
+
 
 class ReviewScraper:
     """Amazon product review scraper with date filtering."""
@@ -134,15 +142,8 @@ class ReviewScraper:
                 print("\n❌ Session expired! Please restart and re-login.")
                 return False
             
-            html = await page.content()
-            
-            captcha_indicators = [
-                'Enter the characters you see below',
-                'Type the characters',
-                'solve this puzzle',
-                'api.arkoselabs.com'
-            ]
-            if any(indicator in html for indicator in captcha_indicators):
+            # CAPTCHA 체크는 페이지 안에서 수행 (전체 DOM을 직렬화해서 가져오지 않음)
+            if await page.evaluate(CAPTCHA_CHECK_JS):
                 print("\n🛑 CAPTCHA detected! Stopping scraper.")
                 print("   Please wait 30 minutes and try again.")
                 return False
@@ -154,8 +155,9 @@ class ReviewScraper:
                 self.reached_cutoff = True
                 return True
             
-            # Parse reviews
-            soup = BeautifulSoup(html, 'html.parser')
+            # Parse reviews (리뷰 요소가 나타난 뒤의 HTML을 1회만 가져옴)
+            html = await page.content()
+            soup = BeautifulSoup(html, SOUP_PARSER, parse_only=REVIEW_STRAINER)
             reviews = self.parser.parse_reviews(soup)
             
             if not reviews:
@@ -271,15 +273,8 @@ class DailyReviewScraper:
                 self.error_message = "Session expired"
                 return False
             
-            html = await page.content()
-            
-            captcha_indicators = [
-                'Enter the characters you see below',
-                'Type the characters',
-                'solve this puzzle',
-                'api.arkoselabs.com'
-            ]
-            if any(indicator in html for indicator in captcha_indicators):
+            # CAPTCHA 체크는 페이지 안에서 수행 (전체 DOM을 직렬화해서 가져오지 않음)
+            if await page.evaluate(CAPTCHA_CHECK_JS):
                 self.error_message = "CAPTCHA detected"
                 return False
             
@@ -290,7 +285,9 @@ class DailyReviewScraper:
                 self.reached_cutoff = True
                 return True
             
-            soup = BeautifulSoup(html, 'html.parser')
+            # 리뷰 요소가 나타난 뒤의 HTML을 1회만 가져옴
+            html = await page.content()
+            soup = BeautifulSoup(html, SOUP_PARSER, parse_only=REVIEW_STRAINER)
             reviews = self.parser.parse_reviews(soup)
             
             if not reviews:
@@ -15,7 +15,7 @@ import logging
 import re
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,9 @@ TIKTOK_SENDERS = [
 # 6자리 인증 코드 정규식
 VERIFICATION_CODE_PATTERN = re.compile(r"\b(\d{6})\b")
 
+# 폴링 간격 스케줄 시작값 (초): 0.5 → 1 → 2 → 4 ... → poll_interval 상한
+INITIAL_POLL_INTERVAL = 0.5
+
 
 class GmailVerificationCodeReader:
     """Gmail에서 TikTok 인증 코드를 자동으로 읽는 유틸리티.
@@ -261,19 +264,47 @@ class GmailVerificationCodeReader:
 
         return False
 
+    @staticmethod
+    def _poll_delays(
+        poll_interval: float,
+        poll_interval_schedule: Optional[Callable[[int], float]] = None,
+    ):
+        """n번째 폴링 후 대기 시간 생성기.
+
+        대부분의 코드는 발송 후 3~10초 내 도착하므로 고정 간격 대신
+        지수 증가 후 poll_interval에서 고정되는 간격을 사용한다.
+        """
+        if poll_interval_schedule is None:
+            def poll_interval_schedule(i: int) -> float:
+                return min(poll_interval, INITIAL_POLL_INTERVAL * 2 ** i)
+
+        attempt = 0
+        while True:
+            yield poll_interval_schedule(attempt)
+            attempt += 1
+
     def wait_for_verification_code(
         self,
         timeout: int = 120,
-        poll_interval: int = 5,
+        poll_interval: float = 4,
+        poll_interval_schedule: Optional[Callable[[int], float]] = None,
     ) -> Optional[str]:
-        """동기 버전."""
+        """동기 버전.
+
+        Args:
+            timeout: 최대 대기 시간 (초)
+            poll_interval: 폴링 간격 상한 (초)
+            poll_interval_schedule: n번째 폴링 후 대기 시간을 반환하는 함수
+                (기본: 0.5초부터 2배씩 증가, poll_interval 상한)
+        """
         start_time = time.time()
         search_after = datetime.now(timezone.utc) - timedelta(seconds=30)
+        delays = self._poll_delays(poll_interval, poll_interval_schedule)
 
         method = "Gmail API" if (self.service_account_file and self.target_email) else "IMAP"
         logger.info(
             f"TikTok 인증 코드 이메일 대기 시작 ({method}) "
-            f"(최대 {timeout}초, {poll_interval}초 간격)"
+            f"(최대 {timeout}초, 최대 {poll_interval}초 간격)"
         )
 
         while time.time() - start_time < timeout:
@@ -282,9 +313,9 @@ class GmailVerificationCodeReader:
                 logger.info(f"인증 코드 발견: {code}")
                 return code
 
-            elapsed = int(time.time() - start_time)
-            logger.info(f"  인증 코드 대기 중... ({elapsed}초 경과)")
-            time.sleep(poll_interval)
+            elapsed = time.time() - start_time
+            logger.info(f"  인증 코드 대기 중... ({int(elapsed)}초 경과)")
+            time.sleep(max(0.0, min(next(delays), timeout - elapsed)))
 
         logger.error(f"인증 코드 이메일 대기 타임아웃 ({timeout}초)")
         return None
@@ -292,18 +323,20 @@ class GmailVerificationCodeReader:
     async def async_wait_for_verification_code(
         self,
         timeout: int = 120,
-        poll_interval: int = 5,
+        poll_interval: float = 4,
+        poll_interval_schedule: Optional[Callable[[int], float]] = None,
     ) -> Optional[str]:
-        """비동기 버전: Playwright event loop를 블로킹하지 않음"""
+        """비동기 버전: Playwright event loop를 블로킹하지 않음 (인자는 동기 버전과 동일)"""
         import asyncio
 
         start_time = time.time()
         search_after = datetime.now(timezone.utc) - timedelta(seconds=30)
+        delays = self._poll_delays(poll_interval, poll_interval_schedule)
 
         method = "Gmail API" if (self.service_account_file and self.target_email) else "IMAP"
         logger.info(
             f"TikTok 인증 코드 이메일 대기 시작 ({method}) "
-            f"(최대 {timeout}초, {poll_interval}초 간격)"
+            f"(최대 {timeout}초, 최대 {poll_interval}초 간격)"
         )
 
         loop = asyncio.get_event_loop()
@@ -315,9 +348,9 @@ class GmailVerificationCodeReader:
                 logger.info(f"인증 코드 발견: {code}")
                 return code
 
-            elapsed = int(time.time() - start_time)
-            logger.info(f"  인증 코드 대기 중... ({elapsed}초 경과)")
-            await asyncio.sleep(poll_interval)
+            elapsed = time.time() - start_time
+            logger.info(f"  인증 코드 대기 중... ({int(elapsed)}초 경과)")
+            await asyncio.sleep(max(0.0, min(next(delays), timeout - elapsed)))
 
         logger.error(f"인증 코드 이메일 대기 타임아웃 ({timeout}초)")
         return None